@@ -0,0 +1,51 @@
+import hashlib
+import math
+from typing import Iterator
+
+
+class BloomFilter:
+    """Fixed-size set membership with false positives but no false negatives
+
+    Sized for capacity keys at error_rate; past capacity the false positive
+    rate climbs, so owners rebuild a larger one instead of adding forever.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> Iterator[int]:
+        # Double hashing: two 64-bit halves of one digest stand in for k hashes
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        size = self.size
+        position = int.from_bytes(digest[:8], "little") % size
+        step = (int.from_bytes(digest[8:], "little") | 1) % size or 1
+        for _ in range(self.hashes):
+            yield position
+            position = (position + step) % size
+
+    def add(self, key: str) -> None:
+        """Add key; count only grows for keys that weren't already present"""
+        added = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not self._bits[position >> 3] & mask:
+                self._bits[position >> 3] |= mask
+                added = True
+        self.count += added
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        for position in self._positions(key):
+            # Most absent keys miss on the first probe or two
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
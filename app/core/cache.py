@@ -0,0 +1,112 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from pymongo.asynchronous.collection import AsyncCollection
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache[K: Hashable, V]:
+    """Bounded LRU cache whose entries expire after a TTL"""
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        """Return a live entry, or None on a miss"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, expires_at: float | None = None) -> None:
+        """Store value until the TTL, or an earlier monotonic deadline, passes"""
+        if self.max_size <= 0:
+            return
+        deadline = time.monotonic() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        self._data[key] = (deadline, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def pop_where(self, predicate: Callable[[V], bool]) -> None:
+        """Drop every entry whose value matches; a full scan, so keep it rare"""
+        for key in [key for key, (_, value) in self._data.items() if predicate(value)]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class VersionStamp:
+    """Shared counter document that lets processes notice each other's writes"""
+
+    def __init__(
+        self,
+        collection: Callable[[], AsyncCollection[dict[str, Any]]],
+        key: str,
+        interval: float,
+    ) -> None:
+        self.collection = collection
+        self.key = key
+        self.interval = interval
+        self._version: int | None = None
+        self._checked_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    async def changed(self) -> bool:
+        """Poll the stamp at most once per interval; True if it moved"""
+        now = time.monotonic()
+        if not self.enabled or now - self._checked_at < self.interval:
+            return False
+        self._checked_at = now
+        try:
+            doc = await self.collection().find_one({"_id": self.key})
+        except Exception as e:
+            logger.error("Failed to read cache stamp %s: %s", self.key, e)
+            return False
+        version = doc["version"] if doc else 0
+        changed = self._version is not None and version != self._version
+        self._version = version
+        return changed
+
+    async def bump(self) -> None:
+        """Advance the stamp so other processes drop their cached entries"""
+        if not self.enabled:
+            return
+        try:
+            await self.collection().update_one(
+                {"_id": self.key}, {"$inc": {"version": 1}}, upsert=True
+            )
+        except Exception as e:
+            logger.error("Failed to bump cache stamp %s: %s", self.key, e)
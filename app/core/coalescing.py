@@ -0,0 +1,134 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Coroutine, Hashable, Mapping
+
+from app.core.deadlines import remaining_seconds, shared_context
+
+
+def _retrieve(future: asyncio.Future[Any]) -> None:
+    """Mark a shared result's error as seen, even if every waiter gave up"""
+    if not future.cancelled():
+        future.exception()
+
+
+class SingleFlight[K: Hashable, V]:
+    """Concurrent calls for the same key share one in-flight call
+
+    The shared task runs in a shared_context(), so it isn't bound by the
+    deadline (or Mongo timeout) of whichever caller started it. Each caller
+    waits on a shield of it for no longer than its own remaining budget,
+    raising TimeoutError when that runs out; a caller that goes away (client
+    disconnect, deadline) doesn't cancel the work the others are waiting on.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.shared = 0
+        self._inflight: dict[K, asyncio.Task[V]] = {}
+
+    async def do(self, key: K, fn: Callable[[], Coroutine[Any, Any, V]]) -> V:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(
+                fn(), context=shared_context()
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.wait_for(asyncio.shield(task), remaining_seconds())
+
+    def _forget(self, key: K, task: asyncio.Task[V]) -> None:
+        _retrieve(task)
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "inflight": len(self._inflight),
+            "calls": self.calls,
+            "shared": self.shared,
+        }
+
+
+class BatchLoader[K: Hashable, V]:
+    """Collects lookups made within a short window into one batch call
+
+    The batch function gets the distinct keys and returns what it found;
+    keys it leaves out resolve to None. A batch goes out when the window
+    closes or max_size keys are waiting, whichever comes first. A window
+    of 0 still batches the lookups made in the same event loop iteration.
+
+    Like SingleFlight, the batch runs in a shared_context() and each
+    caller waits only as long as its own deadline allows.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[list[K]], Awaitable[Mapping[K, V]]],
+        window: float,
+        max_size: int,
+    ) -> None:
+        self.load_batch = load
+        self.window = window
+        self.max_size = max_size
+        self.batches = 0
+        self.keys = 0
+        self._pending: dict[K, asyncio.Future[V | None]] = {}
+        self._timer: asyncio.TimerHandle | asyncio.Handle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def load(self, key: K) -> V | None:
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            future.add_done_callback(_retrieve)
+            if len(self._pending) >= self.max_size:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = (
+                    loop.call_later(self.window, self._dispatch)
+                    if self.window > 0
+                    else loop.call_soon(self._dispatch)
+                )
+        return await asyncio.wait_for(asyncio.shield(future), remaining_seconds())
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        self.batches += 1
+        self.keys += len(batch)
+        # Keep a reference so the task isn't GC'd before it resolves the batch
+        task = asyncio.get_running_loop().create_task(
+            self._run(batch), context=shared_context()
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: dict[K, asyncio.Future[V | None]]) -> None:
+        try:
+            found = await self.load_batch(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except asyncio.CancelledError:
+            for future in batch.values():
+                future.cancel()
+            raise
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(found.get(key))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "keys": self.keys,
+        }
@@ -1,5 +1,6 @@
 from datetime import timedelta
 import os
+from typing import Literal
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -9,23 +10,156 @@ class Settings(BaseSettings):
     SECRET_KEY: str = Field(default_factory=lambda: os.getenv("SECRET_KEY", ""))
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
 
     # Database
     MONGODB_URL: str = Field(default_factory=lambda: os.getenv("MONGODB_URL", ""))
     MONGODB_DB_NAME: str = "auth_db"
+    MONGODB_TLS: bool = True
+    # Connection pool per process: a server with SERVER_WORKERS workers opens
+    # up to SERVER_WORKERS * MONGODB_MAX_POOL_SIZE connections
+    MONGODB_MAX_POOL_SIZE: int = 10
+    MONGODB_MIN_POOL_SIZE: int = 0
+    # Log commands slower than this (0 disables) and explain a sample of them
+    SLOW_QUERY_THRESHOLD_MS: float = 100
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+    # Explain each slow filter shape at most once per interval
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: float = 300
+
+    # Request deadlines, as "METHOD /route/template": ms (0 = no deadline).
+    # Mongo calls get the remaining budget via pymongo.timeout (maxTimeMS and
+    # pool checkout), and hashing refuses jobs that can't finish within it
+    REQUEST_DEADLINE_MS: float = 1000
+    REQUEST_DEADLINES_MS: dict[str, float] = {
+        "POST /users/login": 3000,
+        "POST /users/register": 3000,
+        "POST /users/import": 0,
+        "GET /users/export": 0,
+    }
+    # Answer 503 before doing any work past these limits (0 disables each)
+    SHED_MAX_IN_FLIGHT: int = 256
+    SHED_POOL_WAIT_MS: float = 500
+    SHED_RETRY_AFTER_SECONDS: int = 1
+
+    # Server mode (python -m app.server); unused on Lambda
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 1
+    SERVER_ACCESS_LOG: bool = False
+    # On shutdown, wait this long for in-flight requests before closing Mongo
+    SHUTDOWN_DRAIN_SECONDS: float = 10
+
+    # Startup
+    # Create the Mongo client and hashing context on first use, not at startup
+    LAZY_INIT: bool = True
+    # Startup fails if the indexes can't be created or verified. On Lambda
+    # prefer False and run `python -m app.database.indexes` on deploy; until a
+    # process sees the unique indexes, writes check for duplicates themselves
+    ENSURE_INDEXES_ON_STARTUP: bool = True
 
     # Security Policies
     MIN_PASSWORD_LENGTH: int = 12
     MIN_AGE: int = 13  # COPPA compliance
 
+    # Password hashing
+    # Lambda has no /dev/shm, so "process" only works in container/server mode
+    HASHING_EXECUTOR: Literal["thread", "process"] = "thread"
+    # Per process, so server workers split the CPUs between them by default
+    HASHING_WORKERS: int = Field(
+        default_factory=lambda data: max(
+            1, (os.cpu_count() or 1) // max(1, data["SERVER_WORKERS"])
+        )
+    )
+    HASHING_MAX_QUEUE: int = 64
+    HASHING_RETRY_AFTER_SECONDS: int = 1
+    # bcrypt work factor; pick it with `python -m app.core.hashing --target-ms`.
+    # Logins rehash stored passwords whose rounds differ from it.
+    BCRYPT_ROUNDS: int = 12
+    # Calibrate to BCRYPT_TARGET_MS at startup instead. Every process calibrates
+    # on its own, so mixed hardware can flip hashes between rounds on login
+    BCRYPT_CALIBRATE_ON_STARTUP: bool = False
+    BCRYPT_TARGET_MS: float = 250
+    BCRYPT_MIN_ROUNDS: int = 10
+    BCRYPT_MAX_ROUNDS: int = 16
+
+    # Validate documents read from Mongo again before returning them (debugging)
+    STRICT_SERIALIZATION: bool = False
+
+    # Pagination
+    USERS_PAGE_DEFAULT_LIMIT: int = 50
+    USERS_PAGE_MAX_LIMIT: int = 200
+    # Shorter prefixes match most of an index, so they are rejected
+    USERS_PREFIX_MIN_LENGTH: int = 3
+    EXPORT_BATCH_SIZE: int = 1000
+    BULK_IMPORT_BATCH_SIZE: int = 500
+
+    # Authenticated user cache (max size 0 disables it)
+    USER_CACHE_MAX_SIZE: int = 1024
+    USER_CACHE_TTL_SECONDS: float = 30
+    # Poll a shared Mongo stamp this often to see other processes' writes (0 = off)
+    USER_CACHE_STAMP_INTERVAL_SECONDS: float = 0
+
+    # Cache misses for users are looked up together: lookups made within this
+    # window share one $in query. 0 batches only lookups made in the same
+    # event loop iteration, which adds no wait; a timer window costs ~1 ms+
+    USER_BATCH_WINDOW_MS: float = 0
+    USER_BATCH_MAX_SIZE: int = 100
+
+    # Verified JWT cache (max size 0 disables it)
+    TOKEN_CACHE_MAX_SIZE: int = 4096
+
+    # Revoked access tokens: each process polls for new revocations this often
+    # and keeps them in a Bloom filter sized for this many at this error rate
+    REVOCATION_SYNC_INTERVAL_SECONDS: float = 5
+    REVOCATION_FILTER_CAPACITY: int = 100_000
+    REVOCATION_FILTER_ERROR_RATE: float = 0.001
+    # Filter hits confirmed against Mongo are remembered for a token lifetime;
+    # unlike the caches above this can't be disabled, or every hit is a read
+    REVOCATION_CONFIRMED_MAX_SIZE: int = Field(default=4096, ge=1)
+
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: Literal["text", "json"] = "text"
+    # Format and write records on a background thread; None means on except on
+    # Lambda, where a frozen environment would hold back queued lines
+    LOG_QUEUE: bool | None = None
+    # Fraction of INFO records kept per logger (longest name prefix wins)
+    LOG_SAMPLE_RATES: dict[str, float] = {"app.services.users.access": 0.1}
+
+    # Metrics
+    # Serve Prometheus text at /metrics. Off by default: the route would sit
+    # unauthenticated on the public API (and is exempt from load shedding)
+    METRICS_ENABLED: bool = False
+    # When set, /metrics also requires "Authorization: Bearer <token>"
+    METRICS_TOKEN: str | None = None
+    # One CloudWatch EMF log line per request; None means on when running on Lambda
+    METRICS_EMF: bool | None = None
+    METRICS_EMF_NAMESPACE: str = "fastapi-mongo"
+
     class Config:
         env_file = ".env"
         extra = "ignore"
 
+    @property
+    def is_lambda(self) -> bool:
+        return bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+
+    @property
+    def log_queue_enabled(self) -> bool:
+        return not self.is_lambda if self.LOG_QUEUE is None else self.LOG_QUEUE
+
+    @property
+    def emf_enabled(self) -> bool:
+        return self.is_lambda if self.METRICS_EMF is None else self.METRICS_EMF
+
     @property
     def token_expires_delta(self) -> timedelta:
         return timedelta(minutes=self.ACCESS_TOKEN_EXPIRE_MINUTES)
 
+    @property
+    def refresh_token_expires_delta(self) -> timedelta:
+        return timedelta(days=self.REFRESH_TOKEN_EXPIRE_DAYS)
+
     def validate_secrets(self) -> None:
         if not self.SECRET_KEY:
             raise RuntimeError("SECRET_KEY must be set in environment variables")
@@ -37,4 +171,3 @@ class Settings(BaseSettings):
 
 settings = Settings()
 settings.validate_secrets()
-settings.validate_db()
@@ -0,0 +1,283 @@
+import asyncio
+import contextvars
+import json
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any
+
+import pymongo
+from fastapi import HTTPException, status
+from pymongo import _csot, monitoring
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Routes that must keep answering while the service sheds load
+SHED_EXEMPT_ROUTES = {"GET /metrics"}
+
+# Monotonic time by which the current request must be answered, if any
+current_deadline: ContextVar[float | None] = ContextVar(
+    "current_deadline", default=None
+)
+
+
+def remaining_seconds() -> float | None:
+    """Budget left for the current request; None when it has no deadline"""
+    deadline = current_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def background_context() -> contextvars.Context:
+    """Context for tasks that outlive a request and so must not inherit its
+    deadline (or the Mongo timeout derived from it)"""
+    return contextvars.Context()
+
+
+def shared_deadline_seconds() -> float | None:
+    """Longest deadline any request may have; None if some have none"""
+    if not settings.REQUEST_DEADLINE_MS:
+        return None
+    budgets = [settings.REQUEST_DEADLINE_MS, *settings.REQUEST_DEADLINES_MS.values()]
+    return max(budgets) / 1000
+
+
+def _start_deadline(timeout: float | None) -> None:
+    """What DeadlineMiddleware sets up, in place of any inherited deadline"""
+    _csot.reset_all()
+    if timeout is None:
+        current_deadline.set(None)
+        return
+    deadline = time.monotonic() + timeout
+    current_deadline.set(deadline)
+    _csot.TIMEOUT.set(timeout)
+    _csot.DEADLINE.set(deadline)
+
+
+def shared_context() -> contextvars.Context:
+    """Context for work shared by concurrent requests
+
+    A copy of the caller's, so Mongo commands still count towards its
+    request metrics, but with the caller's deadline and Mongo timeout
+    swapped for shared_deadline_seconds(): the work must not fail because
+    the request that started it is short on time, nor run unbounded.
+    """
+    context = contextvars.copy_context()
+    context.run(_start_deadline, shared_deadline_seconds())
+    return context
+
+
+def deadline_exceeded() -> HTTPException:
+    load_monitor.deadline_exceeded += 1
+    return HTTPException(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        detail="Request deadline exceeded",
+        headers={"X-Error": "DEADLINE_EXCEEDED"},
+    )
+
+
+def database_error(error: Exception, detail: str) -> HTTPException:
+    """HTTP error for a failed Mongo call: 504 when the deadline ran out
+
+    TimeoutError is a caller giving up on a shared lookup (see coalescing).
+    """
+    if isinstance(error, TimeoutError) or getattr(error, "timeout", False):
+        return deadline_exceeded()
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=detail
+    )
+
+
+class LoadMonitor(monitoring.ConnectionPoolListener):
+    """In-flight requests and Mongo pool checkout waits, for load shedding
+
+    Checkout events carry no waiter id, so waits are tracked as a FIFO of
+    start times; the head approximates the longest current wait.
+    """
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.shed_in_flight = 0
+        self.shed_pool_wait = 0
+        self.deadline_exceeded = 0
+        self._waiting: deque[float] = deque()
+
+    @property
+    def pool_waiters(self) -> int:
+        return len(self._waiting)
+
+    def oldest_pool_wait(self) -> float:
+        return time.monotonic() - self._waiting[0] if self._waiting else 0.0
+
+    def connection_check_out_started(
+        self, event: monitoring.ConnectionCheckOutStartedEvent
+    ) -> None:
+        self._waiting.append(time.monotonic())
+
+    def connection_checked_out(
+        self, event: monitoring.ConnectionCheckedOutEvent
+    ) -> None:
+        if self._waiting:
+            self._waiting.popleft()
+
+    def connection_check_out_failed(
+        self, event: monitoring.ConnectionCheckOutFailedEvent
+    ) -> None:
+        if self._waiting:
+            self._waiting.popleft()
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        pass
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        pass
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        pass
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        pass
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        pass
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        # Waiters on a closed pool never get a checked-out/failed event
+        self._waiting.clear()
+
+    def overload(self) -> str | None:
+        """Why a new request should be refused right now, if it should"""
+        if (
+            settings.SHED_MAX_IN_FLIGHT
+            and self.in_flight >= settings.SHED_MAX_IN_FLIGHT
+        ):
+            self.shed_in_flight += 1
+            return "too many requests in flight"
+        if (
+            settings.SHED_POOL_WAIT_MS
+            and self.oldest_pool_wait() * 1000 >= settings.SHED_POOL_WAIT_MS
+        ):
+            self.shed_pool_wait += 1
+            return "Mongo pool wait too long"
+        return None
+
+    async def drain(self, timeout: float) -> int:
+        """Wait up to timeout for in-flight requests; returns those left"""
+        deadline = time.monotonic() + timeout
+        while self.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        return self.in_flight
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "in_flight": self.in_flight,
+            "pool_waiters": self.pool_waiters,
+            "oldest_pool_wait_seconds": self.oldest_pool_wait(),
+            "shed_in_flight": self.shed_in_flight,
+            "shed_pool_wait": self.shed_pool_wait,
+            "deadline_exceeded": self.deadline_exceeded,
+        }
+
+
+load_monitor = LoadMonitor()
+metrics.register_stats("load", load_monitor.stats)
+
+
+def configured_routes(app: Any, keys: set[str]) -> list[tuple[str, BaseRoute]]:
+    """The app's routes named in keys ("METHOD /route/template"), in order"""
+    routes = []
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        for method in getattr(route, "methods", None) or ():
+            key = f"{method} {getattr(route, 'path', '')}"
+            if key in keys:
+                routes.append((key, route))
+    return routes
+
+
+class DeadlineMiddleware:
+    """Gives each request a deadline and sheds load before doing any work
+
+    The deadline comes from REQUEST_DEADLINES_MS for the route, falling back
+    to REQUEST_DEADLINE_MS; 0 means none. It is applied with pymongo.timeout,
+    so every Mongo operation in the request, including waiting for a pooled
+    connection, gets the remaining budget (sent to the server as maxTimeMS).
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._routes: list[tuple[str, BaseRoute]] | None = None
+
+    def route_key(self, scope: Scope) -> str | None:
+        """The configured route key the request hits, if any
+
+        Keys have the form "METHOD /route/template".
+
+        Only routes with their own deadline or shedding rule are matched,
+        which keeps this to a few regex checks instead of the whole table.
+        """
+        if self._routes is None:
+            keys = set(settings.REQUEST_DEADLINES_MS) | SHED_EXEMPT_ROUTES
+            self._routes = configured_routes(scope.get("app"), keys)
+        method = scope["method"]
+        for key, route in self._routes:
+            if key.startswith(method) and route.matches(scope)[0] == Match.FULL:
+                return key
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        key = self.route_key(scope)
+        if key not in SHED_EXEMPT_ROUTES and (reason := load_monitor.overload()):
+            logger.warning("Shedding %s %s: %s", scope["method"], scope["path"], reason)
+            await send_unavailable(send)
+            return
+
+        budget_ms = settings.REQUEST_DEADLINE_MS
+        if key is not None:
+            budget_ms = settings.REQUEST_DEADLINES_MS.get(key, budget_ms)
+        load_monitor.in_flight += 1
+        try:
+            if not budget_ms:
+                await self.app(scope, receive, send)
+                return
+            token = current_deadline.set(time.monotonic() + budget_ms / 1000)
+            try:
+                with pymongo.timeout(budget_ms / 1000):
+                    await self.app(scope, receive, send)
+            finally:
+                current_deadline.reset(token)
+        finally:
+            load_monitor.in_flight -= 1
+
+
+async def send_unavailable(send: Send) -> None:
+    body = json.dumps({"detail": "Service overloaded, retry later"}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status.HTTP_503_SERVICE_UNAVAILABLE,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(settings.SHED_RETRY_AFTER_SECONDS).encode()),
+                (b"x-error", b"OVERLOADED"),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
@@ -1,13 +1,307 @@
-from passlib.context import CryptContext
+import argparse
+import asyncio
+import functools
+import logging
+import math
+import os
+import statistics
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.deadlines import remaining_seconds
+from app.core.metrics import metrics
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+
+# Work factor chosen by configure_rounds(); falls back to BCRYPT_ROUNDS
+_rounds: int | None = None
+
+
+def bcrypt_rounds() -> int:
+    return _rounds or settings.BCRYPT_ROUNDS
+
+
+def configure_rounds(rounds: int) -> None:
+    """Switch the bcrypt work factor for new hashes and needs_rehash()"""
+    global _rounds
+    _rounds = rounds
+    get_pwd_context.cache_clear()
+
+
+@functools.cache
+def get_pwd_context() -> "CryptContext":
+    """bcrypt context, built on first use to keep passlib off the cold start"""
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=bcrypt_rounds()
+    )
 
 
 def get_password_hash(password: str) -> str:
     """Securely hash password using bcrypt"""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True when a stored hash was made with a different work factor"""
+    return get_pwd_context().needs_update(hashed_password)
+
+
+def time_hash(rounds: int, samples: int = 3) -> float:
+    """Median seconds for one bcrypt hash at the given work factor"""
+    from passlib.hash import bcrypt
+
+    hasher = bcrypt.using(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.hash("calibration-password")
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def calibrate_rounds(
+    target_ms: float, min_rounds: int, max_rounds: int
+) -> tuple[int, dict[int, float]]:
+    """Pick the work factor whose hash time is closest to target_ms
+
+    Each extra round doubles the cost, so one measurement at min_rounds
+    predicts the rest; the pick is then measured and re-predicted from
+    that closer sample. Returns the rounds and the estimated ms per rounds.
+    """
+
+    def estimate(base: int, seconds: float) -> dict[int, float]:
+        return {
+            rounds: seconds * 1000 * 2 ** (rounds - base)
+            for rounds in range(min_rounds, max_rounds + 1)
+        }
+
+    def closest(estimates: dict[int, float]) -> int:
+        return min(estimates, key=lambda r: abs(math.log2(estimates[r] / target_ms)))
+
+    estimates = estimate(min_rounds, time_hash(min_rounds))
+    rounds = closest(estimates)
+    if rounds != min_rounds:
+        estimates = estimate(rounds, time_hash(rounds, samples=1))
+        rounds = closest(estimates)
+    return rounds, estimates
+
+
+def apply_calibration() -> int:
+    """Calibrate against BCRYPT_TARGET_MS and use the result in this process"""
+    rounds, estimates = calibrate_rounds(
+        settings.BCRYPT_TARGET_MS,
+        settings.BCRYPT_MIN_ROUNDS,
+        settings.BCRYPT_MAX_ROUNDS,
+    )
+    configure_rounds(rounds)
+    logger.info(
+        "bcrypt calibrated to %s rounds (~%.0f ms, target %.0f ms)",
+        rounds,
+        estimates[rounds],
+        settings.BCRYPT_TARGET_MS,
+    )
+    return rounds
+
+
+def _timed(fn: Callable[..., Any], *args: Any) -> tuple[Any, float]:
+    """Run fn inside the worker and report how long the work itself took"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class HashingPool:
+    """Bounded executor that keeps bcrypt work off the event loop"""
+
+    def __init__(
+        self, executor: str, workers: int, max_queue: int, retry_after: int
+    ) -> None:
+        self.executor = executor
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+        self._pool: Executor | None = None
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._rejected_deadline = 0
+        # Moving average of one job's run time, to predict queue waits
+        self._run_seconds_avg = 0.0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.executor == "process":
+                # Workers must hash with the parent's (possibly calibrated) rounds
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=configure_rounds,
+                    initargs=(bcrypt_rounds(),),
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="hashing"
+                )
+        return self._pool
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs admitted but still waiting for a free worker"""
+        return max(0, self._in_flight - self.workers)
+
+    def expected_seconds(self) -> float:
+        """Predicted wait plus run time for a job submitted now"""
+        ahead = max(0, self._in_flight + 1 - self.workers)
+        return self._run_seconds_avg * (1 + math.ceil(ahead / self.workers))
+
+    def _busy(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service busy, retry later",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn in the pool, rejecting with 503 when the queue is full or
+        the job couldn't finish before the request's deadline"""
+        if self._in_flight >= self.workers + self.max_queue:
+            self._rejected += 1
+            logger.warning("Hashing queue full (%s waiting)", self.queue_depth)
+            raise self._busy()
+        remaining = remaining_seconds()
+        if remaining is not None and remaining < self.expected_seconds():
+            self._rejected_deadline += 1
+            logger.warning(
+                "Hashing refused: %.0f ms left, ~%.0f ms needed",
+                remaining * 1000,
+                self.expected_seconds() * 1000,
+            )
+            raise self._busy()
+
+        self._in_flight += 1
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, run_seconds = await loop.run_in_executor(
+                self._get_pool(), _timed, fn, *args
+            )
+        finally:
+            self._in_flight -= 1
+
+        wait_seconds = max(0.0, time.perf_counter() - submitted - run_seconds)
+        self._completed += 1
+        self._run_seconds_avg = (
+            run_seconds
+            if not self._run_seconds_avg
+            else 0.8 * self._run_seconds_avg + 0.2 * run_seconds
+        )
+        self._wait_seconds_total += wait_seconds
+        self._wait_seconds_max = max(self._wait_seconds_max, wait_seconds)
+        metrics.observe_hashing(fn.__name__, run_seconds, wait_seconds)
+        return result
+
+    async def map(self, fn: Callable[[Any], Any], items: list[Any]) -> list[Any]:
+        """Run fn over items, `workers` at a time, yielding to interactive work
+
+        Bulk jobs keep at most one job per worker in flight and back off for
+        retry_after seconds whenever admission is refused instead of failing.
+        """
+        results: list[Any] = []
+        for start in range(0, len(items), self.workers):
+            chunk = items[start : start + self.workers]
+            results += await asyncio.gather(
+                *(self._run_with_backoff(fn, item) for item in chunk)
+            )
+        return results
+
+    async def _run_with_backoff(self, fn: Callable[..., Any], *args: Any) -> Any:
+        while True:
+            try:
+                return await self.run(fn, *args)
+            except HTTPException as e:
+                if e.status_code != status.HTTP_503_SERVICE_UNAVAILABLE:
+                    raise
+                # Backing off can't help once the deadline would pass first
+                remaining = remaining_seconds()
+                if remaining is not None and remaining < self.retry_after:
+                    raise
+                await asyncio.sleep(self.retry_after)
+
+    def stats(self) -> dict[str, float]:
+        """Snapshot of queue depth and wait-time metrics"""
+        return {
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "rejected_deadline": self._rejected_deadline,
+            "run_seconds_avg": self._run_seconds_avg,
+            "wait_seconds_total": self._wait_seconds_total,
+            "wait_seconds_max": self._wait_seconds_max,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _forget_pool(self) -> None:
+        # A forked child inherits the executor but none of its workers
+        self._pool = None
+        self._in_flight = 0
+
+
+hashing_pool = HashingPool(
+    executor=settings.HASHING_EXECUTOR,
+    workers=settings.HASHING_WORKERS,
+    max_queue=settings.HASHING_MAX_QUEUE,
+    retry_after=settings.HASHING_RETRY_AFTER_SECONDS,
+)
+metrics.register_stats("hashing_pool", hashing_pool.stats)
+os.register_at_fork(after_in_child=hashing_pool._forget_pool)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash password in the hashing pool"""
+    return await hashing_pool.run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password in the hashing pool"""
+    return await hashing_pool.run(verify_password, plain_password, hashed_password)
+
+
+if __name__ == "__main__":
+    # Offline calibration: python -m app.core.hashing --target-ms 250
+    parser = argparse.ArgumentParser(
+        description="Find the bcrypt rounds closest to a target hash time"
+    )
+    parser.add_argument("--target-ms", type=float, default=settings.BCRYPT_TARGET_MS)
+    parser.add_argument("--min-rounds", type=int, default=settings.BCRYPT_MIN_ROUNDS)
+    parser.add_argument("--max-rounds", type=int, default=settings.BCRYPT_MAX_ROUNDS)
+    args = parser.parse_args()
+
+    rounds, estimates = calibrate_rounds(
+        args.target_ms, args.min_rounds, args.max_rounds
+    )
+    print(f"{'rounds':>6} {'est. ms':>9}")
+    for candidate, ms in estimates.items():
+        marker = "  <-" if candidate == rounds else ""
+        print(f"{candidate:>6} {ms:>9.1f}{marker}")
+    print(f"BCRYPT_ROUNDS={rounds}")
@@ -0,0 +1,130 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import Any, Literal
+
+# Attributes every LogRecord has; anything else was passed via extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "taskName"}
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with extra= fields as top-level keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of INFO-and-below records per logger
+
+    Rates match on the longest logger-name prefix, so "app.services" also
+    covers its children. Warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates: dict[str, float]) -> None:
+        super().__init__()
+        self.rates = rates
+        self._resolved: dict[str, float] = {}
+
+    def rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            prefixes = [
+                prefix
+                for prefix in self.rates
+                if name == prefix or name.startswith(prefix + ".")
+            ]
+            rate = self.rates[max(prefixes, key=len)] if prefixes else 1.0
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        rate = self.rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records untouched so formatting happens on the listener thread
+
+    The stock QueueHandler formats in the caller to make records picklable,
+    which an in-process queue doesn't need.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(
+    level: str,
+    log_format: Literal["text", "json"],
+    use_queue: bool,
+    sample_rates: dict[str, float],
+) -> None:
+    """Install the root handler; with use_queue, I/O moves to a thread"""
+    global _listener
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(
+        JSONFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT)
+    )
+
+    handler: logging.Handler = stream
+    if use_queue:
+        handler = DeferredQueueHandler(queue.SimpleQueue())
+        _listener = logging.handlers.QueueListener(handler.queue, stream)
+        _listener.start()
+        atexit.register(stop_logging)
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+
+    logging.basicConfig(level=level, handlers=[handler], force=True)
+
+
+def _restart_listener() -> None:
+    # Threads don't survive fork, so a forked child needs its own writer
+    if _listener is not None:
+        _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_listener)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread
+
+    Records logged afterwards are written directly, so server workers that
+    exit without running atexit handlers still get their last lines out.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            if isinstance(handler, DeferredQueueHandler):
+                for stream in _listener.handlers:
+                    stream.filters.extend(handler.filters)
+                    root.addHandler(stream)
+                root.removeHandler(handler)
+        _listener = None
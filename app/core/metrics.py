@@ -0,0 +1,242 @@
+import bisect
+import json
+import sys
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Mapping
+
+from pymongo import monitoring
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+HASHING_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21)
+
+
+class Histogram:
+    """Prometheus-style histogram keyed by a fixed tuple of label names"""
+
+    def __init__(
+        self, name: str, help: str, labels: tuple[str, ...], buckets: tuple[float, ...]
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: dict[tuple[str, ...], list[Any]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in self._series.items():
+            labels = ",".join(
+                f'{name}="{value}"' for name, value in zip(self.labels, label_values)
+            )
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+class RequestMetrics:
+    """Work attributed to the request being handled in the current context"""
+
+    __slots__ = ("scope", "mongo_commands", "mongo_seconds", "hashing_seconds")
+
+    def __init__(self, scope: Scope) -> None:
+        self.scope = scope
+        self.mongo_commands = 0
+        self.mongo_seconds = 0.0
+        self.hashing_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        """Route template; the router fills scope["route"] in once matched"""
+        return getattr(self.scope.get("route"), "path", "unmatched")
+
+
+current_request: ContextVar[RequestMetrics | None] = ContextVar(
+    "current_request", default=None
+)
+
+
+class MetricsRegistry:
+    """Process-wide metrics, rendered for Prometheus on demand"""
+
+    def __init__(self) -> None:
+        self.request_duration = Histogram(
+            "http_request_duration_seconds",
+            "Time from request start to the end of the response",
+            ("method", "route", "status"),
+            LATENCY_BUCKETS,
+        )
+        self.request_mongo_commands = Histogram(
+            "http_request_mongo_commands",
+            "Mongo commands issued per request",
+            ("method", "route"),
+            COUNT_BUCKETS,
+        )
+        self.mongo_duration = Histogram(
+            "mongo_command_duration_seconds",
+            "Mongo command round-trip time as reported by the driver",
+            ("command", "outcome"),
+            MONGO_BUCKETS,
+        )
+        self.hashing_duration = Histogram(
+            "password_hashing_duration_seconds",
+            "bcrypt time spent inside a hashing worker",
+            ("operation",),
+            HASHING_BUCKETS,
+        )
+        self.hashing_wait = Histogram(
+            "password_hashing_wait_seconds",
+            "Time a hashing job waited for a free worker",
+            ("operation",),
+            HASHING_BUCKETS,
+        )
+        self._stats: dict[str, Callable[[], Mapping[str, float]]] = {}
+
+    def register_stats(
+        self, prefix: str, stats: Callable[[], Mapping[str, float]]
+    ) -> None:
+        """Expose a component's stats() snapshot as gauges named prefix_key"""
+        self._stats[prefix] = stats
+
+    def observe_mongo(self, command: str, outcome: str, seconds: float) -> None:
+        self.mongo_duration.observe(seconds, command, outcome)
+        request = current_request.get()
+        if request is not None:
+            request.mongo_commands += 1
+            request.mongo_seconds += seconds
+
+    def observe_hashing(self, operation: str, run: float, wait: float) -> None:
+        self.hashing_duration.observe(run, operation)
+        self.hashing_wait.observe(wait, operation)
+        request = current_request.get()
+        if request is not None:
+            request.hashing_seconds += run
+
+    def render_prometheus(self) -> str:
+        lines: list[str] = []
+        for histogram in (
+            self.request_duration,
+            self.request_mongo_commands,
+            self.mongo_duration,
+            self.hashing_duration,
+            self.hashing_wait,
+        ):
+            lines += histogram.render()
+        for prefix, stats in self._stats.items():
+            for key, value in stats().items():
+                name = f"{prefix}_{key}"
+                lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Feeds driver command events into the metrics registry"""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        metrics.observe_mongo(event.command_name, "ok", event.duration_micros / 1e6)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        metrics.observe_mongo(event.command_name, "error", event.duration_micros / 1e6)
+
+
+def emit_emf(
+    method: str, route: str, status_code: int, seconds: float, request: RequestMetrics
+) -> None:
+    """Write one CloudWatch Embedded Metric Format record to stdout
+
+    Lambda ships stdout to CloudWatch Logs, which extracts the metrics from
+    the JSON line without any agent or API call on the request path.
+    """
+    record = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": settings.METRICS_EMF_NAMESPACE,
+                    "Dimensions": [["Method", "Route"]],
+                    "Metrics": [
+                        {"Name": "Latency", "Unit": "Milliseconds"},
+                        {"Name": "MongoCommands", "Unit": "Count"},
+                        {"Name": "MongoTime", "Unit": "Milliseconds"},
+                        {"Name": "HashingTime", "Unit": "Milliseconds"},
+                    ],
+                }
+            ],
+        },
+        "Method": method,
+        "Route": route,
+        "Status": status_code,
+        "Latency": seconds * 1000,
+        "MongoCommands": request.mongo_commands,
+        "MongoTime": request.mongo_seconds * 1000,
+        "HashingTime": request.hashing_seconds * 1000,
+    }
+    sys.stdout.write(json.dumps(record) + "\n")
+    sys.stdout.flush()
+
+
+class MetricsMiddleware:
+    """Times each HTTP request and labels it with its route template
+
+    Plain ASGI rather than BaseHTTPMiddleware so streaming responses are not
+    buffered and the per-request cost stays at a few microseconds.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.emf = settings.emf_enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        request = RequestMetrics(scope)
+        token = current_request.set(request)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            seconds = time.perf_counter() - start
+            current_request.reset(token)
+            # Route templates keep label cardinality bounded; raw paths would not
+            path = request.route
+            method = scope["method"]
+            metrics.request_duration.observe(seconds, method, path, str(status_code))
+            metrics.request_mongo_commands.observe(request.mongo_commands, method, path)
+            if self.emf:
+                emit_emf(method, path, status_code, seconds, request)
@@ -0,0 +1,80 @@
+from typing import Any
+
+import pydantic_core
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse, Response
+
+
+class UserJSONResponse(JSONResponse):
+    """JSON response rendered straight from pydantic models by pydantic-core
+
+    Returning it from a route skips FastAPI's response_model re-validation
+    and jsonable_encoder pass; response_model stays for the OpenAPI schema.
+    Only use it with content that is already the public model (never UserDB).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content)
+
+
+def user_etag(
+    user_id: str | None, version: int, fields: tuple[str, ...] | None = None
+) -> str:
+    """Strong ETag for a user document; changes whenever update_user runs
+
+    A ?fields= response is a different representation, so it gets its own tag.
+    """
+    if fields is None:
+        return f'"{user_id}-{version}"'
+    return f'"{user_id}-{version}+{"+".join(fields)}"'
+
+
+def etag_matches(header: str | None, etag: str, weak: bool = True) -> bool:
+    """Whether an If-None-Match (weak) or If-Match (strong) list names etag"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            if not weak:
+                continue
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def if_match_versions(header: str, user_id: str) -> list[int] | None:
+    """Versions of user_id an If-Match header accepts; None means any ("*")
+
+    Weak tags never satisfy If-Match, and tags for other users are ignored,
+    so a header naming no usable version fails the precondition at once.
+    """
+    if header.strip() == "*":
+        return None
+    prefix = f'"{user_id}-'
+    versions = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith(prefix) and tag.endswith('"'):
+            # Tags from ?fields= reads name the same version
+            version = tag[len(prefix) : -1].split("+", 1)[0]
+            if version.isdigit():
+                versions.append(int(version))
+    if not versions:
+        raise precondition_failed()
+    return versions
+
+
+def precondition_failed() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="User was modified since it was read",
+        headers={"X-Error": "VERSION_MISMATCH"},
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -1,16 +1,31 @@
+import hashlib
 import logging
+import time
+import uuid
 from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta, timezone
 from typing import Any
 import jwt
 from fastapi import HTTPException, status, Depends
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.metrics import metrics
 from app.models.token import TokenData, TokenPayload
-from app.services.users import get_user_by_email
+from app.services.revocations import is_token_revoked
+from app.services.users import get_cached_user_by_email
 from app.models.users import User
 
+logger = logging.getLogger(__name__)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
 
+# Verified tokens keyed by SHA-256 digest; entries never outlive the token's exp
+token_cache: TTLCache[bytes, TokenData] = TTLCache(
+    max_size=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.token_expires_delta.total_seconds(),
+)
+metrics.register_stats("token_cache", token_cache.stats)
+
 
 def create_access_token(
     data: dict[str, Any], expires_delta: timedelta | None = None
@@ -19,7 +34,8 @@ def create_access_token(
     to_encode = data.copy()
     now = datetime.now(timezone.utc)
     expire = now + (expires_delta or settings.token_expires_delta)
-    to_encode.update({"iat": now, "exp": expire})
+    # jti lets a single token be revoked before it expires
+    to_encode.update({"iat": now, "exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
@@ -34,25 +50,38 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        jwt_payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        payload = TokenPayload(**jwt_payload)
-        email: str = payload.sub
-        if not email:
+    token_key = hashlib.sha256(token.encode()).digest()
+    token_data = token_cache.get(token_key)
+    if token_data is None:
+        try:
+            jwt_payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+            payload = TokenPayload(**jwt_payload)
+        except (jwt.InvalidTokenError, jwt.ExpiredSignatureError) as e:
+            logger.error("Token validation error: %s", e)
             raise credentials_exception
-        return TokenData(email=email)
-    except (jwt.InvalidTokenError, jwt.ExpiredSignatureError) as e:
-        logging.error(f"Token validation error: {e}")
+        if not payload.sub:
+            raise credentials_exception
+        token_data = TokenData.from_payload(payload)
+        token_cache.set(
+            token_key,
+            token_data,
+            expires_at=time.monotonic() + (payload.exp - time.time()),
+        )
+
+    # Checked on cache hits too: a revocation must win over a cached token
+    if await is_token_revoked(token_data):
+        logger.warning("Revoked token presented for: %s", token_data.email)
         raise credentials_exception
+    return token_data
 
 
 async def get_current_active_user(
     current_user: TokenData = Depends(get_current_user),
 ) -> User:
     """Ensure user is active and exists"""
-    user = get_user_by_email(current_user.email)
+    user = await get_cached_user_by_email(current_user.email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -1,23 +1,84 @@
 import logging
-from pymongo import MongoClient
+import os
 from typing import Any
-from pymongo.collection import Collection
+
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+
 from app.core.config import settings
-from app.models.users import UserDB
-
-
-try:
-    client: MongoClient[dict[str, Any]] = MongoClient(
-        settings.MONGODB_URL,
-        connectTimeoutMS=5000,  # 5 second connection timeout
-        serverSelectionTimeoutMS=5000,  # 5 second server selection timeout
-        maxPoolSize=10,
-        minPoolSize=0,
-        tls=True,
-        tlsAllowInvalidCertificates=False,
-    )
-    db = client.get_database(settings.MONGODB_DB_NAME)
-    users_collection: Collection[dict[str, UserDB]] = db.get_collection("users")
-    logging.info("Connected to MongoDB")
-except Exception as e:
-    logging.critical(f"Failed to connect to MongoDB: {str(e)}", exc_info=True)
+from app.core.deadlines import load_monitor
+from app.core.metrics import MongoCommandListener
+from app.database.slow_queries import slow_query_listeners
+
+logger = logging.getLogger(__name__)
+
+# Created on first use so cold starts that never touch Mongo don't pay for it
+_client: AsyncMongoClient[dict[str, Any]] | None = None
+
+
+def get_client() -> AsyncMongoClient[dict[str, Any]]:
+    """Return the process-wide Mongo client, creating it on first use"""
+    global _client
+    if _client is None:
+        settings.validate_db()
+        try:
+            _client = AsyncMongoClient(
+                settings.MONGODB_URL,
+                connectTimeoutMS=5000,  # 5 second connection timeout
+                serverSelectionTimeoutMS=5000,  # 5 second server selection timeout
+                maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+                minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+                tls=settings.MONGODB_TLS,
+                tlsAllowInvalidCertificates=False,
+                event_listeners=[
+                    MongoCommandListener(),
+                    load_monitor,
+                    *slow_query_listeners(),
+                ],
+            )
+            logger.info("Connected to MongoDB")
+        except Exception as e:
+            logger.critical("Failed to connect to MongoDB: %s", e, exc_info=True)
+            raise
+    return _client
+
+
+async def close_client() -> None:
+    """Close the process's Mongo client; the next get_client() makes a new one"""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.close()
+        logger.info("Closed MongoDB connection")
+
+
+def _forget_client() -> None:
+    # PyMongo clients are not fork-safe: a forked worker (e.g. gunicorn
+    # --preload) must build its own. Dropped rather than closed, since the
+    # sockets and monitor threads still belong to the parent.
+    global _client
+    _client = None
+
+
+os.register_at_fork(after_in_child=_forget_client)
+
+
+def get_database() -> AsyncDatabase[dict[str, Any]]:
+    return get_client().get_database(settings.MONGODB_DB_NAME)
+
+
+def get_users_collection() -> AsyncCollection[dict[str, Any]]:
+    return get_database().get_collection("users")
+
+
+def get_cache_stamps_collection() -> AsyncCollection[dict[str, Any]]:
+    return get_database().get_collection("cache_stamps")
+
+
+def get_refresh_tokens_collection() -> AsyncCollection[dict[str, Any]]:
+    return get_database().get_collection("refresh_tokens")
+
+
+def get_revoked_tokens_collection() -> AsyncCollection[dict[str, Any]]:
+    return get_database().get_collection("revoked_tokens")
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from typing import Any, Mapping
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.asynchronous.collection import AsyncCollection
+
+from app.database.client import (
+    get_refresh_tokens_collection,
+    get_revoked_tokens_collection,
+    get_users_collection,
+)
+
+logger = logging.getLogger(__name__)
+
+USER_INDEXES = [
+    IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    # GET /users flag and age filters: equality, then the _id page order, then
+    # the age range, so pages come back in order without an in-memory sort
+    IndexModel(
+        [
+            ("is_admin", ASCENDING),
+            ("disabled", ASCENDING),
+            ("_id", ASCENDING),
+            ("age", ASCENDING),
+        ],
+        name="status_id_age",
+    ),
+]
+REFRESH_TOKEN_INDEXES = [
+    # Mongo's TTL monitor removes tokens once expires_at has passed
+    IndexModel(
+        [("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0
+    ),
+    IndexModel([("family", ASCENDING)], name="family"),
+    IndexModel([("user_id", ASCENDING)], name="user_id"),
+]
+REVOKED_TOKEN_INDEXES = [
+    # Kept only as long as the tokens they revoke could still be presented
+    IndexModel(
+        [("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0
+    ),
+    # Incremental sync reads revocations newer than the last one seen
+    IndexModel([("revoked_at", ASCENDING)], name="revoked_at"),
+]
+# Index options that must match, not just the index name
+CHECKED_OPTIONS = ("unique", "expireAfterSeconds")
+
+# Set once the unique user indexes are known to exist in this process; until
+# then writes can't rely on them and check for duplicates themselves
+_unique_user_indexes_verified = False
+
+
+def index_problem(index: IndexModel, existing: Mapping[str, Any]) -> str | None:
+    """What is wrong with a declared index in index_information(), if anything"""
+    name = index.document["name"]
+    if name not in existing:
+        return "missing"
+    if any(
+        existing[name].get(option) != index.document.get(option)
+        for option in CHECKED_OPTIONS
+    ):
+        return "has wrong options"
+    return None
+
+
+def index_plan() -> list[tuple[AsyncCollection[dict[str, Any]], list[IndexModel]]]:
+    """Indexes every collection needs, declared in one place"""
+    return [
+        (get_users_collection(), USER_INDEXES),
+        (get_refresh_tokens_collection(), REFRESH_TOKEN_INDEXES),
+        (get_revoked_tokens_collection(), REVOKED_TOKEN_INDEXES),
+    ]
+
+
+async def ensure_indexes() -> bool:
+    """Create missing indexes and verify they exist with the declared options"""
+    ok = True
+    for collection, indexes in index_plan():
+        try:
+            await collection.create_indexes(indexes)
+            existing = await collection.index_information()
+        except Exception as e:
+            logger.critical(
+                "Failed to ensure indexes on %s: %s", collection.name, e, exc_info=True
+            )
+            ok = False
+            continue
+
+        for index in indexes:
+            if problem := index_problem(index, existing):
+                logger.critical(
+                    "Index %s on %s %s",
+                    index.document["name"],
+                    collection.name,
+                    problem,
+                )
+                ok = False
+
+    if ok:
+        global _unique_user_indexes_verified
+        _unique_user_indexes_verified = True
+        logger.info("MongoDB indexes verified")
+    return ok
+
+
+async def unique_user_indexes_verified() -> bool:
+    """Whether email/username uniqueness is enforced by Mongo
+
+    Checked against the server until it succeeds, so a process started with
+    ENSURE_INDEXES_ON_STARTUP=false trusts the indexes once a deploy step has
+    created them, and keeps checking for duplicates itself until then.
+    """
+    global _unique_user_indexes_verified
+    if _unique_user_indexes_verified:
+        return True
+    try:
+        existing = await get_users_collection().index_information()
+    except Exception as e:
+        logger.error("Failed to read user indexes: %s", e)
+        return False
+    unique = [index for index in USER_INDEXES if index.document.get("unique")]
+    if any(index_problem(index, existing) for index in unique):
+        logger.warning("Unique user indexes missing; checking duplicates per write")
+        return False
+    _unique_user_indexes_verified = True
+    return True
+
+
+if __name__ == "__main__":
+    # Explicit migration: python -m app.database.indexes
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(0 if asyncio.run(ensure_indexes()) else 1)
@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Mapping
+
+from pymongo import monitoring
+
+from app.core.config import settings
+from app.core.deadlines import background_context
+from app.core.metrics import current_request
+
+logger = logging.getLogger(__name__)
+
+# Commands whose filter shape is worth logging, and the fields holding it
+SHAPE_FIELDS: dict[str, tuple[str, ...]] = {
+    "find": ("filter", "sort", "projection"),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "distinct": ("key", "query"),
+    "findAndModify": ("query", "sort", "fields", "update"),
+    "update": ("updates",),
+    "delete": ("deletes",),
+}
+# Driver/session fields the server rejects or ignores inside explain
+EXPLAIN_EXCLUDED_FIELDS = {
+    "lsid",
+    "txnNumber",
+    "readConcern",
+    "writeConcern",
+    "maxTimeMS",
+}
+
+
+def redact(value: Any) -> Any:
+    """Keep field names and operators, replace every literal with "?" """
+    if isinstance(value, Mapping):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # $in/$nin lists collapse to one element so the shape stays stable
+        shapes = [redact(item) for item in value]
+        if all(not isinstance(item, (Mapping, list)) for item in value):
+            return ["?"] if shapes else []
+        return shapes
+    return "?"
+
+
+def command_shape(command_name: str, command: Mapping[str, Any]) -> dict[str, Any]:
+    """Redacted filter/sort/projection of a command, for logs and dedup keys"""
+    shape = {}
+    for field in SHAPE_FIELDS.get(command_name, ()):
+        if field in command:
+            # sort/projection values are structure (1/-1), not user data
+            shape[field] = (
+                command[field]
+                if field in ("sort", "projection", "fields", "key")
+                else redact(command[field])
+            )
+    return shape
+
+
+def plan_summary(plan: dict[str, Any]) -> tuple[str, bool]:
+    """Flatten a winning plan into "LIMIT <- FETCH <- IXSCAN(email_1)" form"""
+    stages = []
+    collscan = False
+    node: dict[str, Any] | None = plan
+    while node:
+        stage = node.get("stage", "?")
+        collscan = collscan or stage == "COLLSCAN"
+        if "indexName" in node:
+            stage += f"({node['indexName']})"
+        stages.append(stage)
+        node = node.get("inputStage") or next(iter(node.get("inputStages", [])), None)
+    return " <- ".join(stages), collscan
+
+
+def winning_plan(explain: dict[str, Any]) -> dict[str, Any]:
+    planner = explain.get("queryPlanner")
+    if planner is None:
+        # Aggregations nest the planner output under their first stage
+        for stage in explain.get("stages", []):
+            if "$cursor" in stage:
+                planner = stage["$cursor"].get("queryPlanner")
+                break
+    plan = (planner or {}).get("winningPlan", {})
+    # Slot-based engine wraps the classic plan tree in queryPlan
+    return dict(plan.get("queryPlan", plan))
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """Logs Mongo commands slower than a threshold and samples their plans
+
+    Started events are kept only for commands with a filter shape, and only
+    until the matching succeeded/failed event arrives. Each slow shape is
+    explained at most once per SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS, and only
+    for a SLOW_QUERY_EXPLAIN_SAMPLE_RATE fraction of occurrences.
+    """
+
+    def __init__(
+        self, threshold_ms: float, sample_rate: float, explain_interval: float
+    ) -> None:
+        self.threshold_micros = threshold_ms * 1000
+        self.sample_rate = sample_rate
+        self.explain_interval = explain_interval
+        self._pending: dict[tuple[Any, int], Mapping[str, Any]] = {}
+        self._explained_at: dict[str, float] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name in SHAPE_FIELDS:
+            self._pending[event.connection_id, event.request_id] = event.command
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, "ok")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, "error")
+
+    def _finish(
+        self,
+        event: monitoring.CommandSucceededEvent | monitoring.CommandFailedEvent,
+        outcome: str,
+    ) -> None:
+        command = self._pending.pop((event.connection_id, event.request_id), None)
+        if event.duration_micros < self.threshold_micros:
+            return
+
+        name = event.command_name
+        collection = command.get(name) if command else None
+        shape = command_shape(name, command) if command else {}
+        request = current_request.get()
+        route = request.route if request else "-"
+        logger.warning(
+            "Slow Mongo %s on %s.%s took %.1f ms (%s) route=%s shape=%s",
+            name,
+            event.database_name,
+            collection,
+            event.duration_micros / 1000,
+            outcome,
+            route,
+            shape,
+        )
+        if command is not None and self._should_explain(name, collection, shape):
+            self._schedule_explain(event.database_name, name, collection, command)
+
+    def _should_explain(self, name: str, collection: Any, shape: Any) -> bool:
+        if random.random() >= self.sample_rate:
+            return False
+        key = f"{collection}:{name}:{shape}"
+        now = time.monotonic()
+        if now - self._explained_at.get(key, -self.explain_interval) < (
+            self.explain_interval
+        ):
+            return False
+        self._explained_at[key] = now
+        return True
+
+    def _schedule_explain(
+        self, database: str, name: str, collection: Any, command: Mapping[str, Any]
+    ) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # Explain off the request path; keep a reference so the task isn't GC'd
+        task = loop.create_task(
+            self._explain(database, name, collection, command),
+            context=background_context(),
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(
+        self, database: str, name: str, collection: Any, command: Mapping[str, Any]
+    ) -> None:
+        from app.database.client import get_client
+
+        explained = {
+            key: value
+            for key, value in command.items()
+            if not key.startswith("$") and key not in EXPLAIN_EXCLUDED_FIELDS
+        }
+        try:
+            result = await get_client()[database].command(
+                {"explain": explained, "verbosity": "queryPlanner"}
+            )
+        except Exception as e:
+            logger.warning("Explain of slow %s on %s failed: %s", name, collection, e)
+            return
+
+        summary, collscan = plan_summary(winning_plan(result))
+        if collscan:
+            logger.error(
+                "COLLSCAN in slow %s on %s.%s: %s", name, database, collection, summary
+            )
+        else:
+            logger.warning(
+                "Plan for slow %s on %s.%s: %s", name, database, collection, summary
+            )
+
+
+def slow_query_listeners() -> list[monitoring.CommandListener]:
+    """The listener for the client, or none when the threshold is disabled"""
+    if settings.SLOW_QUERY_THRESHOLD_MS <= 0:
+        return []
+    return [
+        SlowQueryListener(
+            threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+            sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+            explain_interval=settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+        )
+    ]
@@ -1,6 +1,6 @@
+import asyncio
 from contextlib import asynccontextmanager
 import logging
-import sys
 
 from mangum import Mangum
 from fastapi import FastAPI
@@ -8,28 +8,68 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
-from app.routers import users
+from app.core.config import settings
+from app.core.deadlines import DeadlineMiddleware, load_monitor
+from app.core.hashing import apply_calibration, get_pwd_context, hashing_pool
+from app.core.logs import configure_logging, stop_logging
+from app.core.metrics import MetricsMiddleware
+from app.database.client import close_client, get_client
+from app.database.indexes import ensure_indexes
+from app.routers import metrics, users
 
-# Configure logging for Lambda environment
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s %(name)s %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
+configure_logging(
+    level=settings.LOG_LEVEL,
+    log_format=settings.LOG_FORMAT,
+    use_queue=settings.log_queue_enabled,
+    sample_rates=settings.LOG_SAMPLE_RATES,
 )
 
 logging.getLogger("mangum.lifespan").setLevel(logging.INFO)
 logging.getLogger("mangum.http").setLevel(logging.INFO)
 
+_started = False
+
+
+async def startup() -> None:
+    """Per-process initialization; a no-op after the first call"""
+    global _started
+    if _started:
+        return
+    _started = True
+    logging.info("Starting API")
+    if not settings.LAZY_INIT:
+        get_client()
+        get_pwd_context()
+    if settings.BCRYPT_CALIBRATE_ON_STARTUP:
+        await asyncio.to_thread(apply_calibration)
+    # Registration relies on the unique indexes instead of checking first
+    if settings.ENSURE_INDEXES_ON_STARTUP and not await ensure_indexes():
+        raise RuntimeError("MongoDB indexes could not be created or verified")
+
+
+async def shutdown() -> None:
+    logging.info("Shutting down API")
+    # Requests still running (e.g. streaming exports) need Mongo to finish
+    if left := await load_monitor.drain(settings.SHUTDOWN_DRAIN_SECONDS):
+        logging.warning("Shutting down with %d requests in flight", left)
+    hashing_pool.shutdown()
+    await close_client()
+    stop_logging()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    logging.info("Starting API")
+    await startup()
     yield
-    logging.info("Shutting down API")
+    # Mangum runs the lifespan around every invocation; a Lambda environment
+    # is frozen between invocations, not shut down, so keep resources warm
+    if not settings.is_lambda:
+        await shutdown()
 
 
 app = FastAPI(lifespan=lifespan, redirect_slashes=False)
+# Inside CORS, so 503s from load shedding still carry CORS headers
+app.add_middleware(DeadlineMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -38,9 +78,13 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["Content-Disposition", "Content-Type", "Content-Length"],
 )
+# Outermost, so the timing covers CORS and error handling too
+app.add_middleware(MetricsMiddleware)
 
 # Routers
 app.include_router(users.router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
 
 # Add static files
 static_dir = os.path.join(os.path.dirname(__file__), "static")
@@ -0,0 +1,22 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class BulkImportResult(BaseModel):
+    """Outcome of a single record in a bulk import"""
+
+    index: int = Field(description="Position of the record in the request")
+    status: Literal["created", "duplicate", "invalid", "failed"]
+    id: str | None = Field(default=None, description="Id of the created user")
+    error: str | None = None
+
+
+class BulkImportReport(BaseModel):
+    """Summary and per-record results of a bulk import"""
+
+    created: int = 0
+    duplicate: int = 0
+    invalid: int = 0
+    failed: int = 0
+    results: list[BulkImportResult] = []
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 
+
 class Token(BaseModel):
     """JWT access token response model"""
 
@@ -12,6 +13,16 @@ class Token(BaseModel):
         description="Token expiration in seconds",
         examples=[1800],  # 30 minutes
     )
+    refresh_token: str | None = Field(
+        default=None,
+        description="Single-use token for POST /users/refresh; rotated on every use",
+        examples=["3q2-7wEXAMPLE..."],
+    )
+    refresh_expires_in: int | None = Field(
+        default=None,
+        description="Refresh token expiration in seconds",
+        examples=[2592000],  # 30 days
+    )
 
 
 class TokenPayload(BaseModel):
@@ -26,6 +37,11 @@ class TokenPayload(BaseModel):
     iat: int = Field(
         description="Issued at timestamp (Unix epoch)", examples=[1717019000]
     )
+    jti: str | None = Field(
+        default=None,
+        description="Token ID used for revocation; absent on older tokens",
+        examples=["9f1c2e4b7a6d4f0e8b3a5c7d9e1f2a3b"],
+    )
 
 
 class TokenData(BaseModel):
@@ -34,8 +50,11 @@ class TokenData(BaseModel):
     email: str = Field(
         description="User's unique email identifier", examples=["user@example.com"]
     )
+    jti: str | None = Field(default=None, description="Token ID, if the token has one")
+    iat: int = Field(default=0, description="Issued at timestamp (Unix epoch)")
+    exp: int = Field(default=0, description="Expiration timestamp (Unix epoch)")
 
     @classmethod
     def from_payload(cls, payload: TokenPayload) -> "TokenData":
         """Convert raw payload to validated token data"""
-        return cls(email=payload.sub)
+        return cls(email=payload.sub, jti=payload.jti, iat=payload.iat, exp=payload.exp)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, SerializeAsAny
 
 from app.models.users import User
 
@@ -10,4 +10,13 @@ class UserCollection(BaseModel):
     This exists because providing a top-level array in a JSON response can be a [vulnerability](https://haacked.com/archive/2009/06/25/json-hijacking.aspx/)
     """
 
-    students: list[User]
+    # SerializeAsAny so ?fields= pages of narrowed models serialize as they are
+    users: list[SerializeAsAny[User]]
+    next_cursor: str | None = Field(
+        default=None,
+        description="Opaque cursor for the next page; null on the last page",
+    )
+    total: int | None = Field(
+        default=None,
+        description="Number of users matching the filters, when count=true",
+    )
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+
+class UserFilter(BaseModel):
+    """Server-side filters for GET /users; each combination has an index"""
+
+    min_age: int | None = None
+    max_age: int | None = None
+    is_admin: bool | None = None
+    disabled: bool | None = None
+    username_prefix: str | None = None
+    email_prefix: str | None = None
+    # Also return the total number of matches
+    count: bool = False
@@ -1,4 +1,7 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
+import functools
+from typing import Any
+
+from pydantic import BaseModel, EmailStr, Field, create_model, field_validator
 from app.core.config import settings
 
 
@@ -12,13 +15,47 @@ class UserBase(BaseModel):
     disabled: bool = False
 
 
+class UserUpdate(BaseModel):
+    """Fields of a profile update; only those sent are written"""
+
+    name: str | None = Field(default=None, min_length=2, max_length=50)
+    surname: str | None = Field(default=None, min_length=2, max_length=50)
+    username: str | None = Field(
+        default=None, min_length=3, max_length=20, pattern=r"^[a-zA-Z0-9_]+$"
+    )
+    email: EmailStr | None = None
+    age: int | None = Field(default=None, ge=settings.MIN_AGE, le=120)
+    is_admin: bool | None = None
+    disabled: bool | None = None
+
+    def changes(self) -> dict[str, Any]:
+        """The fields the client sent; an explicit null is not a change"""
+        return {
+            key: value
+            for key, value in self.model_dump(exclude_unset=True).items()
+            if value is not None
+        }
+
+
 class User(UserBase):
     id: str | None
+    # Bumped on every profile update; documents from before versioning read as 0
+    version: int = 0
 
     class Config:
         from_attributes = True
 
 
+@functools.cache
+def partial_user_model(fields: tuple[str, ...]) -> type[BaseModel]:
+    """User narrowed to the given fields, for ?fields= responses"""
+    definitions: dict[str, Any] = {
+        name: (User.model_fields[name].annotation, User.model_fields[name])
+        for name in fields
+    }
+    return create_model(f"User_{'_'.join(fields)}", **definitions)
+
+
 class UserDBCreate(UserBase):
     password: str = Field(min_length=settings.MIN_PASSWORD_LENGTH)
 
@@ -37,6 +74,7 @@ class UserDBCreate(UserBase):
 class UserDB(UserBase):
     id: str
     password: str
+    version: int = 0
 
     class Config:
         from_attributes = True
@@ -0,0 +1,38 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+def check_metrics_token(authorization: str | None = Header(default=None)) -> None:
+    """Require METRICS_TOKEN as a bearer token, when one is configured"""
+    if settings.METRICS_TOKEN is None:
+        return
+    expected = f"Bearer {settings.METRICS_TOKEN}".encode()
+    if authorization is None or not secrets.compare_digest(
+        authorization.encode(), expected
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+# GET /metrics
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+    dependencies=[Depends(check_metrics_token)],
+)
+async def read_metrics():
+    return PlainTextResponse(
+        metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
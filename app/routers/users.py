@@ -1,14 +1,43 @@
-from fastapi import APIRouter, status, Depends
-from app.core.security import get_current_active_user
-from app.models.users import User, UserBase, UserDBCreate
+from fastapi import APIRouter, Header, Query, Request, status, Depends
+from fastapi.responses import Response, StreamingResponse
+from app.core.config import settings
+from app.core.responses import (
+    UserJSONResponse,
+    etag_matches,
+    not_modified,
+    user_etag,
+)
+from app.core.security import get_current_active_user, get_current_user
+from app.models.users import User, UserDBCreate, UserUpdate
+from app.models.user_collection import UserCollection
+from app.models.user_filter import UserFilter
+from app.models.bulk_import import BulkImportReport
 
-from app.schemas.auth_form import AuthForm
-from app.models.token import Token
-from app.services.auth import login_for_access_token
+from app.schemas.auth_form import AuthForm, LogoutForm, RefreshForm
+from app.models.token import Token, TokenData
+from app.services.auth import (
+    login_for_access_token,
+    logout,
+    refresh_access_token,
+    revoke_user_sessions,
+)
+from app.services.bulk_import import (
+    check_import_allowed,
+    import_users,
+    iter_json_array,
+    iter_ndjson,
+)
 from app.services.users import (
+    EXPORT_MEDIA_TYPES,
+    ExportFormat,
     create_user,
     delete_user,
+    export_users,
+    narrow_user,
+    parse_fields,
+    parse_ids,
     retrieve_user,
+    retrieve_user_version,
     retrieve_users,
     update_user,
 )
@@ -19,6 +48,58 @@ router = APIRouter(
 )
 
 
+def requested_fields(
+    fields: str | None = Query(
+        default=None,
+        description="Comma-separated User fields to return, e.g. id,username",
+    ),
+) -> tuple[str, ...] | None:
+    return parse_fields(fields)
+
+
+AGE_FILTER_DESCRIPTION = "Needs a prefix filter, or both is_admin and disabled"
+
+
+def user_filters(
+    min_age: int | None = Query(
+        default=None, ge=0, le=120, description=AGE_FILTER_DESCRIPTION
+    ),
+    max_age: int | None = Query(
+        default=None, ge=0, le=120, description=AGE_FILTER_DESCRIPTION
+    ),
+    is_admin: bool | None = Query(default=None),
+    disabled: bool | None = Query(default=None),
+    username_prefix: str | None = Query(
+        default=None,
+        max_length=20,
+        description=(
+            f"At least {settings.USERS_PREFIX_MIN_LENGTH} characters; "
+            "pages then come in username order"
+        ),
+    ),
+    email_prefix: str | None = Query(
+        default=None,
+        max_length=254,
+        description=(
+            f"At least {settings.USERS_PREFIX_MIN_LENGTH} characters; "
+            "pages then come in email order unless username_prefix is set"
+        ),
+    ),
+    count: bool = Query(
+        default=False, description="Also return the total number of matches"
+    ),
+) -> UserFilter:
+    return UserFilter(
+        min_age=min_age,
+        max_age=max_age,
+        is_admin=is_admin,
+        disabled=disabled,
+        username_prefix=username_prefix,
+        email_prefix=email_prefix,
+        count=count,
+    )
+
+
 # POST /users/register
 @router.post(
     "/register",
@@ -26,7 +107,41 @@ router = APIRouter(
     status_code=status.HTTP_201_CREATED,
 )
 async def register(user: UserDBCreate):
-    return create_user(user)
+    return await create_user(user)
+
+
+# POST /users/import
+@router.post(
+    "/import",
+    response_model=BulkImportReport,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "array",
+                        "items": UserDBCreate.model_json_schema(),
+                    }
+                },
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+            "required": True,
+        }
+    },
+)
+async def import_user_records(
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+) -> BulkImportReport:
+    """Bulk-create users from a JSON array or an NDJSON stream (admin only)"""
+    # Before the body is read: a JSON array is buffered and parsed whole
+    check_import_allowed(current_user)
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("application/x-ndjson"):
+        records = iter_ndjson(request.stream())
+    else:
+        records = iter_json_array(await request.body())
+    return await import_users(current_user, records)
 
 
 # POST /users/login
@@ -36,52 +151,147 @@ async def register(user: UserDBCreate):
 )
 async def login(form_data: AuthForm = Depends()) -> Token:
     """Authenticate user and return access token"""
-    return login_for_access_token(form_data)
+    return await login_for_access_token(form_data)
+
+
+# POST /users/refresh
+@router.post(
+    "/refresh",
+    response_model=Token,
+)
+async def refresh(form_data: RefreshForm = Depends()) -> Token:
+    """Exchange a refresh token for a new access token and refresh token"""
+    return await refresh_access_token(form_data)
+
+
+# POST /users/logout
+@router.post(
+    "/logout",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def logout_session(
+    form_data: LogoutForm = Depends(),
+    token: TokenData = Depends(get_current_user),
+) -> None:
+    """Revoke the current access token, and its refresh token if sent"""
+    await logout(token, form_data)
 
 
 # GET /users/me
 @router.get(
     "/me",
     response_model=User,
+    response_class=UserJSONResponse,
 )
-async def read_users_me(current_user: User = Depends(get_current_active_user)) -> User:
+async def read_users_me(
+    fields: tuple[str, ...] | None = Depends(requested_fields),
+    if_none_match: str | None = Header(default=None),
+    current_user: User = Depends(get_current_active_user),
+) -> Response:
     """Retrieve current authenticated user's profile"""
-    return current_user
+    etag = user_etag(current_user.id, current_user.version, fields)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return UserJSONResponse(narrow_user(current_user, fields), headers={"ETag": etag})
 
 
 # GET /users
 @router.get(
     "/",
-    response_model=list[User],
+    response_model=UserCollection,
+    response_class=UserJSONResponse,
 )
 async def list_users(
+    limit: int = Query(
+        default=settings.USERS_PAGE_DEFAULT_LIMIT,
+        ge=1,
+        le=settings.USERS_PAGE_MAX_LIMIT,
+    ),
+    after: str | None = Query(
+        default=None, description="next_cursor from the previous page"
+    ),
+    ids: str | None = Query(
+        default=None,
+        description=(
+            "Comma-separated user ids to fetch in one call instead of a page; "
+            "unknown ids are left out"
+        ),
+    ),
+    fields: tuple[str, ...] | None = Depends(requested_fields),
+    filters: UserFilter = Depends(user_filters),
+    current_user: User = Depends(get_current_active_user),
+) -> UserJSONResponse:
+    """List users page by page using keyset pagination on _id, or by ids"""
+    return UserJSONResponse(
+        await retrieve_users(
+            current_user, limit, after, fields, filters, parse_ids(ids)
+        )
+    )
+
+
+# GET /users/export
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+)
+async def export_user_collection(
+    export_format: ExportFormat = Query(default="ndjson", alias="format"),
+    after: str | None = Query(
+        default=None, description="Resume after this user id (last one received)"
+    ),
     current_user: User = Depends(get_current_active_user),
-) -> list[User]:
-    return retrieve_users(current_user)
+) -> StreamingResponse:
+    """Stream every user as NDJSON or CSV (admin only)"""
+    rows = await export_users(current_user, export_format, after)
+    return StreamingResponse(
+        rows,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="users.{export_format}"'
+        },
+    )
 
 
 # GET /users/{user_id}
 @router.get(
     "/{user_id}",
     response_model=User,
+    response_class=UserJSONResponse,
 )
 async def get_user(
     user_id: str,
+    fields: tuple[str, ...] | None = Depends(requested_fields),
+    if_none_match: str | None = Header(default=None),
     current_user: User = Depends(get_current_active_user),
-) -> User:
+) -> Response:
     """Retrieve a specific user by ID"""
-    return retrieve_user(user_id, current_user)
+    if if_none_match:
+        version = await retrieve_user_version(user_id, current_user)
+        if version is not None:
+            etag = user_etag(user_id, version, fields)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
+    user = await retrieve_user(user_id, current_user, fields)
+    return UserJSONResponse(
+        narrow_user(user, fields),
+        headers={"ETag": user_etag(user.id, user.version, fields)},
+    )
 
 
 # PUT /users/{user_id}
-@router.put("/{user_id}", response_model=User)
+@router.put("/{user_id}", response_model=User, response_class=UserJSONResponse)
 async def update_user_profile(
     user_id: str,
-    user_update: UserBase,
+    user_update: UserUpdate,
+    if_match: str | None = Header(
+        default=None, description="ETag from a previous read; 412 if it is stale"
+    ),
     current_user: User = Depends(get_current_active_user),
-) -> User:
+) -> UserJSONResponse:
     """Update user profile with partial data"""
-    return update_user(current_user, user_update, user_id)
+    user = await update_user(current_user, user_update, user_id, if_match)
+    return UserJSONResponse(user, headers={"ETag": user_etag(user.id, user.version)})
 
 
 # DELETE /users/{user_id}
@@ -94,4 +304,17 @@ async def delete_user_account(
     current_user: User = Depends(get_current_active_user),
 ) -> None:
     # """Delete user account (admins can delete others, users can delete themselves)"""
-    delete_user(current_user, user_id)
+    await delete_user(current_user, user_id)
+
+
+# POST /users/{user_id}/revoke
+@router.post(
+    "/{user_id}/revoke",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def revoke_sessions(
+    user_id: str,
+    current_user: User = Depends(get_current_active_user),
+) -> None:
+    """Revoke every access and refresh token of a user (admin only)"""
+    await revoke_user_sessions(current_user, user_id)
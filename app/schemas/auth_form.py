@@ -5,3 +5,13 @@ class AuthForm:
     def __init__(self, email: str = Form(...), password: str = Form(...)):
         self.email = email
         self.password = password
+
+
+class RefreshForm:
+    def __init__(self, refresh_token: str = Form(...)):
+        self.refresh_token = refresh_token
+
+
+class LogoutForm:
+    def __init__(self, refresh_token: str | None = Form(None)):
+        self.refresh_token = refresh_token
@@ -0,0 +1,66 @@
+"""
+Long-running HTTP server, for containers that serve steady traffic instead
+of running as a Lambda function:
+
+    python -m app.server                  # SERVER_* settings
+    python -m app.server --workers 4 --port 8080
+
+With more than one worker, uvicorn supervises that many processes, each
+importing the app on its own; nothing Mongo-related is created in the
+supervisor. Every worker has its own Mongo pool and caches.
+"""
+
+import argparse
+import os
+
+from app.core.config import settings
+from app.core.logs import configure_logging
+
+APP = "app.main:app"
+
+
+def serve(
+    app: str = APP,
+    host: str = settings.SERVER_HOST,
+    port: int = settings.SERVER_PORT,
+    workers: int = settings.SERVER_WORKERS,
+) -> None:
+    import uvicorn
+
+    # Workers read it too, to split HASHING_WORKERS between them
+    os.environ["SERVER_WORKERS"] = str(workers)
+    uvicorn.run(
+        app,
+        host=host,
+        port=port,
+        workers=workers,
+        # Logging is configured by app.main, so uvicorn's records go through it
+        log_config=None,
+        access_log=settings.SERVER_ACCESS_LOG,
+        # uvicorn stops reading new requests and waits this long for running
+        # ones before the lifespan shutdown drains what's left
+        timeout_graceful_shutdown=round(settings.SHUTDOWN_DRAIN_SECONDS),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--app", default=APP, help="ASGI app as module:attribute")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS)
+    args = parser.parse_args()
+    # The supervisor never imports app.main; its own records go to stdout too
+    configure_logging(
+        level=settings.LOG_LEVEL,
+        log_format=settings.LOG_FORMAT,
+        use_queue=False,
+        sample_rates={},
+    )
+    serve(args.app, host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
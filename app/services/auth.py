@@ -1,40 +1,87 @@
+import asyncio
 import logging
 from fastapi import HTTPException, status
 from app.models.users import User
-from app.schemas.auth_form import AuthForm
-from app.models.token import Token
-from app.services.users import get_user_db_by_email
-from app.core.hashing import verify_password
+from app.schemas.auth_form import AuthForm, LogoutForm, RefreshForm
+from app.models.token import Token, TokenData
+from app.services.refresh_tokens import (
+    consume_refresh_token,
+    issue_refresh_token,
+    revoke_refresh_family,
+    revoke_refresh_token,
+    revoke_user_refresh_tokens,
+)
+from app.services.revocations import revoke_access_token, revoke_user_tokens
+from app.services.users import (
+    get_user_by_id,
+    get_user_db_by_email,
+    replace_password_hash,
+)
+from app.core.hashing import (
+    get_password_hash_async,
+    needs_rehash,
+    verify_password_async,
+)
+from app.core.deadlines import background_context
 from app.core.security import create_access_token
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
 
-def authenticate_user(email: str, password: str) -> User:
+# Strong references to in-flight rehash tasks so they aren't collected early
+_rehash_tasks: set[asyncio.Task[None]] = set()
+
+
+async def rehash_password(user_id: str, old_hash: str, password: str) -> None:
+    """Re-hash a verified password with the current work factor and store it"""
+    try:
+        new_hash = await get_password_hash_async(password)
+        if await replace_password_hash(user_id, old_hash, new_hash):
+            logger.info("Password hash upgraded for user: %s", user_id)
+    except HTTPException:
+        # Hashing pool is full; the next login will try again
+        logger.info("Password rehash deferred for user: %s", user_id)
+    except Exception as e:
+        logger.error("Password rehash failed for user %s: %s", user_id, e)
+
+
+def schedule_rehash(user_id: str, old_hash: str, password: str) -> None:
+    """Run rehash_password after the response instead of before it"""
+    task = asyncio.create_task(
+        rehash_password(user_id, old_hash, password), context=background_context()
+    )
+    _rehash_tasks.add(task)
+    task.add_done_callback(_rehash_tasks.discard)
+
+
+async def authenticate_user(email: str, password: str) -> User:
     """Authenticate user and return user object"""
-    user = get_user_db_by_email(email)
+    user = await get_user_db_by_email(email)
     if not user:
-        logging.warning(f"Login failed - user not found: {email}")
+        logger.warning("Login failed - user not found: %s", email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not verify_password(password, user.password):
-        logging.warning(f"Login failed - invalid password for user: {email}")
+    if not await verify_password_async(password, user.password):
+        logger.warning("Login failed - invalid password for user: %s", email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    logging.info(f"Successful authentication for user: {email}")
+    if needs_rehash(user.password):
+        schedule_rehash(user.id, user.password, password)
+
+    logger.info("Successful authentication for user: %s", email)
     return User(**user.model_dump())
 
 
-def login_for_access_token(form_data: AuthForm) -> Token:
-    """Generate access token for authenticated user"""
-    user = authenticate_user(form_data.email, form_data.password)
+async def issue_tokens(user: User, family: str | None = None) -> Token:
+    """Access token plus a rotating refresh token for user"""
     access_token = create_access_token(
         data={"sub": user.email}, expires_delta=settings.token_expires_delta
     )
@@ -42,4 +89,65 @@ def login_for_access_token(form_data: AuthForm) -> Token:
         access_token=access_token,
         token_type="bearer",
         expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        refresh_token=await issue_refresh_token(user, family),
+        refresh_expires_in=int(settings.refresh_token_expires_delta.total_seconds()),
+    )
+
+
+async def login_for_access_token(form_data: AuthForm) -> Token:
+    """Generate access token for authenticated user"""
+    user = await authenticate_user(form_data.email, form_data.password)
+    return await issue_tokens(user)
+
+
+async def refresh_access_token(form_data: RefreshForm) -> Token:
+    """Exchange a refresh token for new tokens without a password check"""
+    refresh_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
     )
+    record = await consume_refresh_token(form_data.refresh_token)
+    if record is None:
+        raise refresh_exception
+
+    # Re-read the user so email changes and disabling take effect on refresh
+    user = await get_user_by_id(record["user_id"])
+    if not user or user.disabled:
+        logger.warning("Refresh rejected for user: %s", record["user_id"])
+        await revoke_refresh_family(record["family"])
+        raise refresh_exception
+
+    return await issue_tokens(user, family=record["family"])
+
+
+async def logout(token: TokenData, form_data: LogoutForm) -> None:
+    """Revoke the presented access token and, if given, its refresh session"""
+    await revoke_access_token(token)
+    if form_data.refresh_token:
+        await revoke_refresh_token(form_data.refresh_token)
+    logger.info("User logged out: %s", token.email)
+
+
+async def revoke_user_sessions(current_user: User, user_id: str) -> None:
+    """Sign a user out everywhere (admin only)"""
+    if not current_user.is_admin:
+        logger.warning(
+            "Unauthorized session revocation attempt by: %s", current_user.id
+        )
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to revoke sessions",
+            headers={"X-Error": "PERMISSION_DENIED"},
+        )
+    user = await get_user_by_id(user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+            headers={"X-Error": "USER_NOT_FOUND"},
+        )
+
+    await revoke_user_tokens(user.email)
+    await revoke_user_refresh_tokens(user_id)
+    logger.info("Sessions of %s revoked by %s", user_id, current_user.id)
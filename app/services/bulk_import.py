@@ -0,0 +1,248 @@
+import json
+import logging
+from typing import Any, AsyncIterable, AsyncIterator, Iterable
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.core.hashing import get_password_hash, hashing_pool
+from app.database.client import get_users_collection
+from app.database.indexes import unique_user_indexes_verified
+from app.models.bulk_import import BulkImportReport, BulkImportResult
+from app.models.users import User, UserDBCreate
+
+logger = logging.getLogger(__name__)
+
+# Reported for records a database error kept from being written
+NOT_IMPORTED = "Not imported: the import stopped on a database error"
+MAYBE_IMPORTED = (
+    "Database error while inserting; the user may or may not have been created"
+)
+
+
+class ImportAborted(Exception):
+    """A database error stopped the import; results cover the whole batch"""
+
+    def __init__(self, results: list[BulkImportResult]) -> None:
+        super().__init__("Bulk import stopped on a database error")
+        self.results = results
+
+
+def failed_results(
+    indexes: Iterable[int], error: str = NOT_IMPORTED
+) -> list[BulkImportResult]:
+    return [
+        BulkImportResult(index=index, status="failed", error=error) for index in indexes
+    ]
+
+
+async def iter_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Split a streamed NDJSON body into non-empty lines"""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if pending.strip():
+        yield pending
+
+
+async def iter_json_array(body: bytes) -> AsyncIterator[Any]:
+    """Yield the items of a JSON array body"""
+    try:
+        records = json.loads(body)
+    except ValueError:
+        records = None
+    if not isinstance(records, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a JSON array of users",
+        )
+    for record in records:
+        yield record
+
+
+def validate_record(raw: Any) -> UserDBCreate:
+    """Validate a decoded object or a raw NDJSON line"""
+    if isinstance(raw, bytes):
+        return UserDBCreate.model_validate_json(raw)
+    return UserDBCreate.model_validate(raw)
+
+
+def describe_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in e['loc']) or 'record'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+async def drop_duplicates(
+    valid: list[tuple[int, UserDBCreate]], results: list[BulkImportResult]
+) -> list[tuple[int, UserDBCreate]]:
+    """Records whose email and username are free, reporting the others
+
+    Fallback for while the unique indexes are unverified, when insert_many
+    would accept duplicates instead of reporting them as write errors.
+    """
+    try:
+        existing = await (
+            get_users_collection()
+            .find(
+                {
+                    "$or": [
+                        {"email": {"$in": [user.email for _, user in valid]}},
+                        {"username": {"$in": [user.username for _, user in valid]}},
+                    ]
+                },
+                {"email": 1, "username": 1},
+            )
+            .to_list()
+        )
+    except Exception as e:
+        logger.error("Database error during bulk import: %s", e, exc_info=True)
+        results += failed_results(index for index, _ in valid)
+        raise ImportAborted(sorted(results, key=lambda result: result.index)) from e
+
+    taken = {
+        "email": {user["email"] for user in existing},
+        "username": {user["username"] for user in existing},
+    }
+    free = []
+    for index, user in valid:
+        field = next((f for f in taken if getattr(user, f) in taken[f]), None)
+        if field is not None:
+            results.append(
+                BulkImportResult(
+                    index=index, status="duplicate", error=f"{field} already exists"
+                )
+            )
+            continue
+        # Later records in the batch can't reuse what this one takes
+        for f in taken:
+            taken[f].add(getattr(user, f))
+        free.append((index, user))
+    return free
+
+
+async def import_batch(batch: list[tuple[int, Any]]) -> list[BulkImportResult]:
+    """Validate, hash and insert one batch without aborting on bad records"""
+    results: list[BulkImportResult] = []
+    valid: list[tuple[int, UserDBCreate]] = []
+    for index, raw in batch:
+        try:
+            valid.append((index, validate_record(raw)))
+        except ValidationError as e:
+            results.append(
+                BulkImportResult(
+                    index=index, status="invalid", error=describe_validation_error(e)
+                )
+            )
+
+    if valid and not await unique_user_indexes_verified():
+        valid = await drop_duplicates(valid, results)
+    if not valid:
+        return sorted(results, key=lambda result: result.index)
+
+    hashes = await hashing_pool.map(
+        get_password_hash, [user.password for _, user in valid]
+    )
+    documents = [
+        user.model_dump(exclude={"password"})
+        | {"password": password_hash, "version": 1}
+        for (_, user), password_hash in zip(valid, hashes)
+    ]
+
+    write_errors: dict[int, dict[str, Any]] = {}
+    try:
+        # insert_many assigns _id to each document before sending it
+        await get_users_collection().insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        write_errors = {error["index"]: error for error in e.details["writeErrors"]}
+    except Exception as e:
+        logger.error("Database error during bulk import: %s", e, exc_info=True)
+        results += failed_results((index for index, _ in valid), MAYBE_IMPORTED)
+        raise ImportAborted(sorted(results, key=lambda result: result.index)) from e
+
+    for position, (index, user) in enumerate(valid):
+        error = write_errors.get(position)
+        if error is None:
+            results.append(
+                BulkImportResult(
+                    index=index, status="created", id=str(documents[position]["_id"])
+                )
+            )
+        elif error.get("code") == 11000:
+            field = next(iter(error.get("keyPattern") or {"email": 1}))
+            results.append(
+                BulkImportResult(
+                    index=index, status="duplicate", error=f"{field} already exists"
+                )
+            )
+        else:
+            results.append(
+                BulkImportResult(
+                    index=index, status="failed", error=error.get("errmsg")
+                )
+            )
+    return sorted(results, key=lambda result: result.index)
+
+
+def check_import_allowed(current_user: User) -> None:
+    """Reject non-admins; call before reading the upload"""
+    if not current_user.is_admin:
+        logger.warning("Unauthorized users import attempt by: %s", current_user.email)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to import users",
+            headers={"X-Error": "PERMISSION_DENIED"},
+        )
+
+
+async def import_users(
+    current_user: User, records: AsyncIterable[Any]
+) -> BulkImportReport:
+    """Bulk-create users (restricted to admin users)"""
+    check_import_allowed(current_user)
+
+    logger.info("Users import started by admin: %s", current_user.email)
+    report = BulkImportReport()
+    batch: list[tuple[int, Any]] = []
+    aborted = False
+
+    async def flush() -> None:
+        # After a database error the rest is only counted, so the report
+        # still accounts for every record and keeps what was committed
+        nonlocal aborted
+        if aborted:
+            report.results += failed_results(index for index, _ in batch)
+            return
+        try:
+            report.results += await import_batch(batch)
+        except ImportAborted as e:
+            report.results += e.results
+            aborted = True
+
+    index = 0
+    async for raw in records:
+        batch.append((index, raw))
+        index += 1
+        if len(batch) >= settings.BULK_IMPORT_BATCH_SIZE:
+            await flush()
+            batch = []
+    if batch:
+        await flush()
+
+    for result in report.results:
+        setattr(report, result.status, getattr(report, result.status) + 1)
+    logger.info(
+        "Users import finished: %s created, %s duplicate, %s invalid, %s failed",
+        report.created,
+        report.duplicate,
+        report.invalid,
+        report.failed,
+    )
+    return report
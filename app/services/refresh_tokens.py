@@ -0,0 +1,83 @@
+import hashlib
+import logging
+import secrets
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+
+from pymongo import ReturnDocument
+
+from app.core.config import settings
+from app.database.client import get_refresh_tokens_collection
+from app.models.users import User
+
+logger = logging.getLogger(__name__)
+
+
+def token_digest(token: str) -> str:
+    """Lookup key for a refresh token
+
+    Tokens are 256 random bits, so a fast digest is enough; there is no
+    low-entropy secret here for bcrypt's work factor to protect.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def issue_refresh_token(user: User, family: str | None = None) -> str:
+    """Store a new refresh token for user and return its plaintext once"""
+    token = secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc)
+    await get_refresh_tokens_collection().insert_one(
+        {
+            "_id": token_digest(token),
+            # Every token rotated out of one login shares a family
+            "family": family or uuid.uuid4().hex,
+            "user_id": user.id,
+            "email": user.email,
+            "used": False,
+            "created_at": now,
+            "expires_at": now + settings.refresh_token_expires_delta,
+        }
+    )
+    return token
+
+
+async def consume_refresh_token(token: str) -> dict[str, Any] | None:
+    """Mark a live refresh token used and return it, or None if it isn't live
+
+    Presenting a token that was already rotated means it leaked (or a client
+    raced itself), so the whole family is revoked and the holder must log in.
+    """
+    collection = get_refresh_tokens_collection()
+    digest = token_digest(token)
+    now = datetime.now(timezone.utc)
+    record = await collection.find_one_and_update(
+        {"_id": digest, "used": False, "expires_at": {"$gt": now}},
+        {"$set": {"used": True, "used_at": now}},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if record is not None:
+        return record
+
+    reused = await collection.find_one({"_id": digest, "used": True})
+    if reused is not None:
+        logger.warning("Refresh token reuse detected for user: %s", reused["email"])
+        await revoke_refresh_family(reused["family"])
+    return None
+
+
+async def revoke_refresh_family(family: str) -> None:
+    await get_refresh_tokens_collection().delete_many({"family": family})
+
+
+async def revoke_refresh_token(token: str) -> None:
+    """Revoke the login session a refresh token belongs to"""
+    record = await get_refresh_tokens_collection().find_one(
+        {"_id": token_digest(token)}, {"family": 1}
+    )
+    if record is not None:
+        await revoke_refresh_family(record["family"])
+
+
+async def revoke_user_refresh_tokens(user_id: str) -> None:
+    await get_refresh_tokens_collection().delete_many({"user_id": user_id})
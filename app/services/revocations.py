@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from app.core.bloom import BloomFilter
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.deadlines import (
+    background_context,
+    database_error,
+    deadline_exceeded,
+    remaining_seconds,
+)
+from app.core.metrics import metrics
+from app.database.client import get_revoked_tokens_collection
+from app.models.token import TokenData
+
+logger = logging.getLogger(__name__)
+
+# Revocations are stamped with the writing process's clock; re-read this far
+# back on each sync so skew between processes can't hide one
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def token_key(jti: str) -> str:
+    return f"jti:{jti}"
+
+
+def subject_key(email: str) -> str:
+    return f"sub:{email}"
+
+
+def revoked_before(document: dict[str, Any] | None) -> float:
+    """Tokens under a revocation's key issued at or before this are revoked"""
+    if document is None:
+        return -math.inf
+    return document.get("issued_before", math.inf)
+
+
+class RevocationList:
+    """Revoked access tokens, answered from memory except on filter hits
+
+    Revocations live in Mongo until the tokens they cover expire. Each
+    process mirrors their keys into a Bloom filter: a miss means the token
+    is not revoked with no I/O, and only a hit is confirmed against Mongo.
+    Confirmed answers are remembered per key, so a false positive costs one
+    read per token lifetime rather than one per request.
+
+    Keys are jti:<id> for one token and sub:<email> for every token of a
+    user issued up to a point in time (an admin revocation).
+    """
+
+    def __init__(self, sync_interval: float, capacity: int, error_rate: float) -> None:
+        self.sync_interval = sync_interval
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.lookups = 0
+        self.filter_hits = 0
+        self.confirmations = 0
+        self._filter: BloomFilter | None = None
+        self._built_at = 0.0
+        self._synced_to: datetime | None = None
+        self._checked_at = -math.inf
+        self._known: TTLCache[str, float] = TTLCache(
+            max_size=settings.REVOCATION_CONFIRMED_MAX_SIZE,
+            ttl=settings.token_expires_delta.total_seconds(),
+        )
+        self._rebuild_task: asyncio.Task[None] | None = None
+
+    def _remember(self, key: str, before: float) -> None:
+        if self._filter is not None:
+            self._filter.add(key)
+        self._known.set(key, before)
+
+    async def _build(self) -> None:
+        """Load every live revocation into a fresh filter, then swap it in"""
+        started = datetime.now(timezone.utc)
+        collection = get_revoked_tokens_collection()
+        live = {"expires_at": {"$gt": started}}
+        count = await collection.count_documents(live)
+        bloom = BloomFilter(max(self.capacity, count * 2), self.error_rate)
+        async for document in collection.find(live, {"_id": 1}):
+            bloom.add(document["_id"])
+        # Revocations written while loading are picked up by the next sync
+        self._filter = bloom
+        self._synced_to = min(self._synced_to or started, started)
+        self._built_at = time.monotonic()
+        logger.info(
+            "Revocation filter built: %d keys, %d bytes", bloom.count, bloom.nbytes
+        )
+
+    async def _rebuild(self) -> None:
+        try:
+            await self._build()
+        except Exception as e:
+            logger.error("Failed to rebuild revocation filter: %s", e)
+
+    async def _pull(self) -> None:
+        """Add revocations written since the last sync"""
+        assert self._synced_to is not None
+        cursor = (
+            get_revoked_tokens_collection()
+            .find(
+                {"revoked_at": {"$gt": self._synced_to - SYNC_OVERLAP}},
+                {"_id": 1, "revoked_at": 1, "issued_before": 1},
+            )
+            .sort("revoked_at", 1)
+        )
+        async for document in cursor:
+            self._remember(document["_id"], revoked_before(document))
+            # The driver returns naive UTC datetimes unless tz_aware is set
+            revoked_at = document["revoked_at"].replace(tzinfo=timezone.utc)
+            self._synced_to = max(self._synced_to, revoked_at)
+
+    def _start_rebuild(self) -> asyncio.Task[None]:
+        if self._rebuild_task is None:
+            # Shared by many requests, so bound by none of their deadlines
+            self._rebuild_task = asyncio.create_task(
+                self._rebuild(), context=background_context()
+            )
+            self._rebuild_task.add_done_callback(self._rebuilt)
+        return self._rebuild_task
+
+    def _rebuilt(self, task: asyncio.Task[None]) -> None:
+        self._rebuild_task = None
+
+    async def _first_build(self, task: asyncio.Task[None]) -> None:
+        """Wait for the initial load, but no longer than the request may"""
+        try:
+            await asyncio.wait_for(asyncio.shield(task), remaining_seconds())
+        except TimeoutError:
+            raise deadline_exceeded()
+
+    async def sync(self) -> None:
+        """Poll for new revocations at most once per sync interval"""
+        if self._filter is None and self._rebuild_task is not None:
+            # Concurrent first requests share the initial load
+            await self._first_build(self._rebuild_task)
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.sync_interval:
+            return
+        self._checked_at = now
+        if self._filter is None:
+            await self._first_build(self._start_rebuild())
+            return
+        try:
+            await self._pull()
+        except Exception as e:
+            logger.error("Failed to sync revoked tokens: %s", e)
+            return
+
+        # Expired revocations only leave the filter when it is rebuilt, so
+        # rebuild once per token lifetime or when it fills up, off the request
+        stale = now - self._built_at > settings.token_expires_delta.total_seconds()
+        if stale or self._filter.count > self._filter.capacity:
+            self._start_rebuild()
+
+    async def is_revoked(self, token: TokenData) -> bool:
+        await self.sync()
+        self.lookups += 1
+        if self._filter is None:
+            # Mongo unreachable since startup; the user lookup will fail too
+            return False
+
+        keys = [subject_key(token.email)]
+        if token.jti:
+            keys.append(token_key(token.jti))
+        hits = [key for key in keys if key in self._filter]
+        if not hits:
+            return False
+        self.filter_hits += 1
+
+        befores = {key: self._known.get(key) for key in hits}
+        if unknown := [key for key, before in befores.items() if before is None]:
+            self.confirmations += 1
+            try:
+                documents = await (
+                    get_revoked_tokens_collection()
+                    .find({"_id": {"$in": unknown}}, {"issued_before": 1})
+                    .to_list()
+                )
+            except Exception as e:
+                logger.error("Database error during revocation check: %s", e)
+                raise database_error(e, "Failed to check token revocation")
+            found = {document["_id"]: document for document in documents}
+            for key in unknown:
+                before = revoked_before(found.get(key))
+                self._known.set(key, before)
+                befores[key] = before
+        return any(
+            before is not None and token.iat <= before for before in befores.values()
+        )
+
+    async def revoke(
+        self, key: str, expires_at: datetime, issued_before: float | None = None
+    ) -> None:
+        """Record a revocation and apply it to this process immediately"""
+        fields: dict[str, Any] = {
+            "revoked_at": datetime.now(timezone.utc),
+            "expires_at": expires_at,
+        }
+        if issued_before is not None:
+            fields["issued_before"] = issued_before
+        await get_revoked_tokens_collection().update_one(
+            {"_id": key}, {"$set": fields}, upsert=True
+        )
+        self._remember(key, revoked_before(fields))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "keys": self._filter.count if self._filter else 0,
+            "filter_bytes": self._filter.nbytes if self._filter else 0,
+            "lookups": self.lookups,
+            "filter_hits": self.filter_hits,
+            "confirmations": self.confirmations,
+        }
+
+
+revocation_list = RevocationList(
+    sync_interval=settings.REVOCATION_SYNC_INTERVAL_SECONDS,
+    capacity=settings.REVOCATION_FILTER_CAPACITY,
+    error_rate=settings.REVOCATION_FILTER_ERROR_RATE,
+)
+metrics.register_stats("revocations", revocation_list.stats)
+
+
+async def is_token_revoked(token: TokenData) -> bool:
+    return await revocation_list.is_revoked(token)
+
+
+async def revoke_access_token(token: TokenData) -> None:
+    """Revoke one access token until it would have expired anyway"""
+    if not token.jti:
+        # Issued before tokens carried an ID; it expires within a lifetime
+        logger.warning("Cannot revoke token without jti for: %s", token.email)
+        return
+    expires_at = datetime.fromtimestamp(token.exp, timezone.utc)
+    await revocation_list.revoke(token_key(token.jti), expires_at)
+
+
+async def revoke_user_tokens(email: str) -> None:
+    """Revoke every access token issued to email up to now"""
+    now = datetime.now(timezone.utc)
+    await revocation_list.revoke(
+        subject_key(email),
+        expires_at=now + settings.token_expires_delta,
+        issued_before=now.timestamp(),
+    )
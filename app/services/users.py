@@ -1,128 +1,557 @@
+import base64
+import binascii
+import csv
+import io
 import logging
-from typing import Any
+import re
+from typing import Any, AsyncIterator, Literal
 
 from bson import ObjectId
+from bson.errors import InvalidId
 from fastapi import HTTPException, status
-
-from app.core.hashing import get_password_hash
-from app.models.users import User, UserBase
+from pydantic import BaseModel
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.cache import TTLCache, VersionStamp
+from app.core.coalescing import BatchLoader, SingleFlight
+from app.core.config import settings
+from app.core.deadlines import database_error
+from app.core.hashing import get_password_hash_async
+from app.core.metrics import metrics
+from app.core.responses import if_match_versions, precondition_failed
+from app.models.users import User, UserBase, UserUpdate, partial_user_model
 from app.models.users import UserDB, UserDBCreate
-from app.database.client import users_collection
+from app.models.user_collection import UserCollection
+from app.models.user_filter import UserFilter
+from app.database.client import get_cache_stamps_collection, get_users_collection
+from app.database.indexes import unique_user_indexes_verified
+
+logger = logging.getLogger(__name__)
+# Per-read audit lines; high volume, so sampled by LOG_SAMPLE_RATES by default
+access_logger = logging.getLogger(f"{__name__}.access")
+
+# Never pull the bcrypt hash for reads that only build a User
+USER_PROJECTION = {"password": 0}
+
+ExportFormat = Literal["ndjson", "csv"]
+EXPORT_MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+EXPORT_FIELDS = ["id", *UserBase.model_fields]
+USER_FIELDS = tuple(User.model_fields)
+
+user_cache: TTLCache[str, User] = TTLCache(
+    max_size=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS
+)
+metrics.register_stats("user_cache", user_cache.stats)
+user_cache_stamp = VersionStamp(
+    get_cache_stamps_collection,
+    key="users",
+    interval=settings.USER_CACHE_STAMP_INTERVAL_SECONDS,
+)
+
+
+async def load_users_by_email(emails: list[str]) -> dict[str, User]:
+    users = (
+        await get_users_collection()
+        .find({"email": {"$in": emails}}, USER_PROJECTION)
+        .to_list()
+    )
+    return {user["email"]: serialize_user(user) for user in users}
+
+
+async def load_users_by_id(ids: list[ObjectId]) -> dict[ObjectId, User]:
+    users = (
+        await get_users_collection()
+        .find({"_id": {"$in": ids}}, USER_PROJECTION)
+        .to_list()
+    )
+    return {user["_id"]: serialize_user(user) for user in users}
+
+
+# Concurrent lookups of one user share a query, and lookups of different
+# users close together in time share a single $in
+user_lookups: SingleFlight[tuple[Any, ...], User | None] = SingleFlight()
+user_email_loader = BatchLoader(
+    load_users_by_email,
+    window=settings.USER_BATCH_WINDOW_MS / 1000,
+    max_size=settings.USER_BATCH_MAX_SIZE,
+)
+user_id_loader = BatchLoader(
+    load_users_by_id,
+    window=settings.USER_BATCH_WINDOW_MS / 1000,
+    max_size=settings.USER_BATCH_MAX_SIZE,
+)
+metrics.register_stats("user_lookups", user_lookups.stats)
+metrics.register_stats("user_email_loader", user_email_loader.stats)
+metrics.register_stats("user_id_loader", user_id_loader.stats)
 
 
 def serialize_user_db(user: dict[str, Any]) -> UserDB:
-    """Convert MongoDB document to UserDB model"""
+    """Convert MongoDB document to UserDB model
+
+    Documents are validated on write, so reads trust them unless strict mode
+    is on.
+    """
     user["id"] = str(user["_id"])
-    return UserDB(**user)
+    if settings.STRICT_SERIALIZATION:
+        return UserDB(**user)
+    return UserDB.model_construct(**user)
+
 
+def serialize_user(user: dict[str, Any], fields: tuple[str, ...] | None = None) -> User:
+    """Convert MongoDB document to User model
 
-def serialize_user(user: dict[str, Any]) -> User:
-    """Convert MongoDB document to User model"""
+    Trusted unless strict mode is on, like serialize_user_db. A document read
+    for a fieldset only has those fields (and version), so strict mode
+    validates just them.
+    """
     user["id"] = str(user["_id"])
-    return User(**user)
+    if not settings.STRICT_SERIALIZATION:
+        return User.model_construct(**user)
+    if fields is None:
+        return User(**user)
+    validated = partial_user_model(fields)(**user)
+    return User.model_construct(**(user | vars(validated)))
+
+
+def parse_fields(fields: str | None) -> tuple[str, ...] | None:
+    """Validate a ?fields= list into User field order; None means all fields"""
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    if unknown := requested.difference(USER_FIELDS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+            headers={"X-Error": "INVALID_FIELDS"},
+        )
+    return tuple(field for field in USER_FIELDS if field in requested)
 
 
-def get_users() -> list[User]:
-    """Retrieve users from DB"""
+def parse_ids(ids: str | None) -> list[ObjectId] | None:
+    """Validate a ?ids= list, dropping repeats; None means no batch-get"""
+    if ids is None:
+        return None
+    requested = list(dict.fromkeys(id.strip() for id in ids.split(",") if id.strip()))
+    if len(requested) > settings.USERS_PAGE_MAX_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.USERS_PAGE_MAX_LIMIT} ids per request",
+            headers={"X-Error": "TOO_MANY_IDS"},
+        )
     try:
-        users = list(users_collection.find())
-        if not users:
-            return []
+        return [ObjectId(id) for id in requested]
+    except InvalidId:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid user id in ids",
+            headers={"X-Error": "INVALID_IDS"},
+        )
 
-        return [serialize_user(user) for user in users]
-    except Exception as e:
-        logging.error(f"Database error during users retrieval: {e}")
+
+def user_projection(fields: tuple[str, ...] | None) -> dict[str, int]:
+    """Mongo projection for a fieldset; version always comes along for ETags"""
+    if fields is None:
+        return USER_PROJECTION
+    return {field: 1 for field in fields if field != "id"} | {"version": 1}
+
+
+def narrow_user(user: User, fields: tuple[str, ...] | None) -> BaseModel:
+    """The response model for a fieldset, built from an already-read user"""
+    if fields is None:
+        return user
+    values = {key: value for key, value in vars(user).items() if key in fields}
+    return partial_user_model(fields).model_construct(**values)
+
+
+def encode_cursor(last: ObjectId | str, order: str = "_id") -> str:
+    """Opaque page cursor from the last _id (or order key) of a page
+
+    Pages in _id order keep the bare form; others name their order key,
+    which "." keeps apart from base64.
+    """
+    if isinstance(last, ObjectId):
+        return base64.urlsafe_b64encode(last.binary).decode().rstrip("=")
+    encoded = base64.urlsafe_b64encode(last.encode()).decode().rstrip("=")
+    return f"{order}.{encoded}"
+
+
+def decode_cursor(cursor: str, order: str = "_id") -> Any:
+    """Inverse of encode_cursor; rejects anything it did not produce"""
+    try:
+        if order == "_id":
+            return ObjectId(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        key, _, encoded = cursor.partition(".")
+        if key != order:
+            raise ValueError(cursor)
+        return base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode()
+    except (binascii.Error, InvalidId, TypeError, ValueError):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to retrieve users",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+            headers={"X-Error": "INVALID_CURSOR"},
         )
 
 
-def get_user_db_by_email(email: str) -> UserDB | None:
-    """Retrieve user from DB"""
+def filter_needs_scan(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=detail,
+        headers={"X-Error": "FILTER_NEEDS_SCAN"},
+    )
+
+
+def user_filter_query(
+    filters: UserFilter,
+) -> tuple[dict[str, Any], str | None, str]:
+    """Mongo filter for a UserFilter, the index that must serve it and the
+    page order that index gives without an in-memory sort
+
+    Every accepted combination maps onto a declared index and is hinted, and
+    the index bounds alone narrow the walk to the filter; anything that
+    would effectively scan is rejected instead:
+    - A prefix is a range of its unique index, paged in that field's order.
+      Other filters are checked on the documents in the range.
+    - Flags alone are point intervals of status_id_age, paged in _id order.
+      Every key walked matches, so a broad flag (disabled=false) still
+      costs only a page, though count=true counts every match.
+    - Age is not a bound of either index, only checked per entry, so it is
+      accepted only with a prefix or with both flags.
+    """
+    query: dict[str, Any] = {}
+    index = None
+    order = "_id"
+    for name, prefix in (
+        ("username", filters.username_prefix),
+        ("email", filters.email_prefix),
+    ):
+        if prefix is None:
+            continue
+        if len(prefix) < settings.USERS_PREFIX_MIN_LENGTH:
+            raise filter_needs_scan(
+                f"{name}_prefix needs at least "
+                f"{settings.USERS_PREFIX_MIN_LENGTH} characters; shorter "
+                "prefixes would scan most of the users"
+            )
+        # Anchored and escaped, so Mongo turns it into a tight index range
+        query[name] = {"$regex": f"^{re.escape(prefix)}"}
+        if index is None:
+            index, order = f"{name}_unique", name
+
+    if (
+        filters.min_age is not None
+        and filters.max_age is not None
+        and filters.min_age > filters.max_age
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="min_age must not exceed max_age",
+            headers={"X-Error": "INVALID_FILTER"},
+        )
+    age: dict[str, int] = {}
+    if filters.min_age is not None:
+        age["$gte"] = filters.min_age
+    if filters.max_age is not None:
+        age["$lte"] = filters.max_age
+    if age:
+        query["age"] = age
+    flags = {"is_admin": filters.is_admin, "disabled": filters.disabled}
+    for name, value in flags.items():
+        if value is not None:
+            query[name] = value
+
+    if age and index is None and None in flags.values():
+        raise filter_needs_scan(
+            "min_age and max_age need username_prefix, email_prefix or both "
+            "is_admin and disabled; otherwise they would scan most of the users"
+        )
+
+    if query and index is None:
+        # Unset flags become both values, keeping status_id_age's leading
+        # fields point intervals that Mongo merges back into _id order
+        for name, value in flags.items():
+            if value is None:
+                query[name] = {"$in": [False, True]}
+        index = "status_id_age"
+    return query, index, order
+
+
+async def get_users(
+    limit: int,
+    after: str | None = None,
+    fields: tuple[str, ...] | None = None,
+    filters: UserFilter | None = None,
+) -> UserCollection:
+    """Retrieve one page of users from DB, in _id order (or prefix order)"""
+    query, index, order = user_filter_query(filters or UserFilter())
+    page_query = dict(query)
+    if after:
+        page_query[order] = query.get(order, {}) | {"$gt": decode_cursor(after, order)}
+    options: dict[str, Any] = {"hint": index} if index else {}
+    projection = user_projection(fields)
+    if projection is not USER_PROJECTION:
+        # The next cursor needs the order key even when it isn't asked for
+        projection = projection | {order: 1}
+
     try:
-        if user := users_collection.find_one({"email": email}):
-            return serialize_user_db(user)
-        return None
+        # Fetch one extra document to learn whether another page exists
+        users = (
+            await get_users_collection()
+            .find(page_query, projection, **options)
+            .sort(order, 1)
+            .limit(limit + 1)
+            .to_list()
+        )
+        total = None
+        if filters and filters.count:
+            total = await count_users(query, options)
     except Exception as e:
-        logging.error(f"Database error during user retrieval: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to retrieve user",
+        logger.error("Database error during users retrieval: %s", e)
+        raise database_error(e, "Failed to retrieve users")
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1][order], order)
+
+    return UserCollection.model_construct(
+        users=[narrow_user(serialize_user(user, fields), fields) for user in users],
+        next_cursor=next_cursor,
+        total=total,
+    )
+
+
+async def get_users_by_ids(
+    ids: list[ObjectId], fields: tuple[str, ...] | None = None
+) -> UserCollection:
+    """Retrieve the given users with one $in query, in the order asked for"""
+    try:
+        users = await (
+            get_users_collection()
+            .find({"_id": {"$in": ids}}, user_projection(fields))
+            .to_list()
         )
+    except Exception as e:
+        logger.error("Database error during users retrieval: %s", e)
+        raise database_error(e, "Failed to retrieve users")
+
+    by_id = {user["_id"]: user for user in users}
+    # Ids that don't name a user are left out rather than failing the batch
+    return UserCollection.model_construct(
+        users=[
+            narrow_user(serialize_user(by_id[id], fields), fields)
+            for id in ids
+            if id in by_id
+        ],
+        next_cursor=None,
+        total=None,
+    )
+
+
+async def count_users(query: dict[str, Any], options: dict[str, Any]) -> int:
+    """Total matches; unfiltered totals come from collection metadata"""
+    collection = get_users_collection()
+    if not query:
+        return await collection.estimated_document_count()
+    return await collection.count_documents(query, **options)
 
 
-def get_user_by_email(email: str) -> User | None:
+async def get_user_db_by_email(email: str) -> UserDB | None:
     """Retrieve user from DB"""
     try:
-        if user := users_collection.find_one({"email": email}):
-            return serialize_user(user)
+        if user := await get_users_collection().find_one({"email": email}):
+            return serialize_user_db(user)
         return None
     except Exception as e:
-        logging.error(f"Database error during user retrieval: {e}")
+        logger.error("Database error during user retrieval: %s", e)
+        raise database_error(e, "Failed to retrieve user")
+
+
+async def get_user_by_email(email: str) -> User | None:
+    """Retrieve user from DB, sharing the query with concurrent lookups"""
+    try:
+        return await user_lookups.do(
+            ("email", email), lambda: user_email_loader.load(email)
+        )
+    except Exception as e:
+        logger.error("Database error during user retrieval: %s", e)
+        raise database_error(e, "Failed to retrieve user")
+
+
+async def get_cached_user_by_email(email: str) -> User | None:
+    """Retrieve user through the in-process cache"""
+    if await user_cache_stamp.changed():
+        user_cache.clear()
+    if user := user_cache.get(email):
+        return user
+    if user := await get_user_by_email(email):
+        user_cache.set(email, user)
+    return user
+
+
+async def invalidate_cached_user(*emails: str, user_id: str | None = None) -> None:
+    """Drop cached users locally and signal other processes
+
+    user_id also drops entries under an email the caller no longer knows,
+    such as the old address after an email change.
+    """
+    for email in emails:
+        user_cache.pop(email)
+    if user_id is not None:
+        user_cache.pop_where(lambda user: user.id == user_id)
+    await user_cache_stamp.bump()
+
+
+def user_object_id(user_id: str) -> ObjectId:
+    """Parse a user id from a path; a malformed one can't name a user"""
+    try:
+        return ObjectId(user_id)
+    except (InvalidId, TypeError):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to retrieve user",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+            headers={"X-Error": "USER_NOT_FOUND"},
         )
 
 
-def get_user_by_id(id: str) -> User | None:
-    """Retrieve user from DB"""
+async def get_user_by_id(id: str, fields: tuple[str, ...] | None = None) -> User | None:
+    """Retrieve user from DB, only the given fields if any"""
+    object_id = user_object_id(id)
+
+    async def find_user() -> User | None:
+        if fields is None:
+            return await user_id_loader.load(object_id)
+        # Fieldset reads keep their projection instead of joining a batch
+        if user := await get_users_collection().find_one(
+            {"_id": object_id}, user_projection(fields)
+        ):
+            return serialize_user(user, fields)
+        return None
+
     try:
-        if user := users_collection.find_one({"_id": ObjectId(id)}):
-            return serialize_user(user)
+        return await user_lookups.do(("id", id, fields), find_user)
+    except Exception as e:
+        logger.error("Database error during user retrieval: %s", e)
+        raise database_error(e, "Failed to retrieve user")
+
+
+async def get_user_version(id: str) -> int | None:
+    """Read only the version of a user, or None if it doesn't exist"""
+    query = {"_id": user_object_id(id)}
+    try:
+        if user := await get_users_collection().find_one(query, {"version": 1}):
+            return user.get("version", 0)
         return None
     except Exception as e:
-        logging.error(f"Database error during user retrieval: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to retrieve user",
-        )
+        logger.error("Database error during user retrieval: %s", e)
+        raise database_error(e, "Failed to retrieve user")
 
 
-def create_user(user_in: UserDBCreate) -> UserDB:
+def duplicate_key_field(error: DuplicateKeyError) -> str:
+    """Name of the unique field that rejected a write"""
+    key_pattern = (error.details or {}).get("keyPattern") or {"email": 1}
+    return next(iter(key_pattern))
+
+
+def duplicate_field_error(field: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=(
+            "Username already taken"
+            if field == "username"
+            else "Email already registered"
+        ),
+    )
+
+
+async def check_unique_fields(
+    values: dict[str, Any], exclude_id: ObjectId | None = None
+) -> None:
+    """Reject a taken email or username while the unique indexes are unverified
+
+    Racy, like any check-then-write; only a fallback until the indexes exist.
+    """
+    clauses = [
+        {field: values[field]} for field in ("email", "username") if field in values
+    ]
+    if not clauses or await unique_user_indexes_verified():
+        return
+    query: dict[str, Any] = {"$or": clauses}
+    if exclude_id is not None:
+        query["_id"] = {"$ne": exclude_id}
+    try:
+        existing = await get_users_collection().find_one(query, {"email": 1})
+    except Exception as e:
+        logger.error("Database error during uniqueness check: %s", e)
+        raise database_error(e, "Failed to check user uniqueness")
+    if existing:
+        field = "email" if existing.get("email") == values.get("email") else "username"
+        logger.warning("Write with existing %s rejected by fallback check", field)
+        raise duplicate_field_error(field)
+
+
+async def create_user(user_in: UserDBCreate) -> UserDB:
     """Create new user with secure password handling"""
-    if get_user_db_by_email(user_in.email):
-        logging.warning(f"Registration attempt with existing email: {user_in.email}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
-        )
+    # Uniqueness is enforced by the email/username indexes, so this is a
+    # single round trip with no check-then-insert race once they are verified.
+    # The fallback check runs first so a duplicate doesn't cost a bcrypt hash
+    await check_unique_fields(user_in.model_dump(include={"email", "username"}))
 
-    # Security: Hash password BEFORE database interaction
+    # Security: Hash password BEFORE writing the user
     user_db_create = UserDBCreate(
         **user_in.model_dump(exclude={"password"}),
-        password=get_password_hash(user_in.password),
+        password=await get_password_hash_async(user_in.password),
     )
 
-    logging.info(f"Creating new user: {user_db_create}")
-
+    logger.info("Creating new user: %s", user_in.email)
     try:
-        result = users_collection.insert_one(
-            user_db_create.model_dump(by_alias=True, exclude={"id"})
+        result = await get_users_collection().insert_one(
+            user_db_create.model_dump(by_alias=True, exclude={"id"}) | {"version": 1}
         )
-        created_user = users_collection.find_one({"_id": result.inserted_id})
+    except DuplicateKeyError as e:
+        field = duplicate_key_field(e)
+        logger.warning(
+            "Registration attempt with existing %s: %s", field, user_in.email
+        )
+        raise duplicate_field_error(field)
     except Exception as e:
-        logging.error(f"Database error during user creation: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="User registration failed",
-        ) from e
+        logger.error("Database error during user creation: %s", e, exc_info=True)
+        raise database_error(e, "User registration failed") from e
 
-    if not created_user:
-        logging.critical("User created but not found in database")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="User creation succeeded but retrieval failed",
-        )
+    return UserDB(id=str(result.inserted_id), version=1, **user_db_create.model_dump())
+
+
+async def retrieve_user_version(user_id: str, current_user: User) -> int | None:
+    """Version of a user the caller may view, without reading the profile
+
+    Returns None when it can't be answered cheaply (not allowed, not found),
+    leaving retrieve_user to produce the right error.
+    """
+    if current_user.id == user_id:
+        return current_user.version
+    if not current_user.is_admin:
+        return None
+    return await get_user_version(user_id)
 
-    return serialize_user_db(created_user)
 
+async def retrieve_user(
+    user_id: str, current_user: User, fields: tuple[str, ...] | None = None
+) -> User:
+    """Get user when given ID, with security checks
 
-def retrieve_user(user_id: str, current_user: User) -> User:
-    """Get user when given ID, with security checks"""
-    user = get_user_by_id(user_id)
+    With fields, only those (plus id and version) are read from Mongo.
+    """
+    if current_user.id == user_id:
+        # Loaded moments ago, usually from the user cache, by the auth dependency
+        access_logger.info("User profile accessed: %s", current_user.email)
+        return current_user
+
+    user = await get_user_by_id(user_id, fields)
     if not user:
-        logging.warning(f"User not found: {user_id}")
+        logger.warning("User not found: %s", user_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
@@ -131,8 +560,8 @@ def retrieve_user(user_id: str, current_user: User) -> User:
 
     # Security: Only admins or self can view
     if not current_user.is_admin and current_user.id != user.id:
-        logging.warning(
-            f"Unauthorized access attempt to user {user_id} by {current_user.id}"
+        logger.warning(
+            "Unauthorized access attempt to user %s by %s", user_id, current_user.id
         )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -140,101 +569,238 @@ def retrieve_user(user_id: str, current_user: User) -> User:
             headers={"X-Error": "PERMISSION_DENIED"},
         )
 
-    logging.info(f"User profile accessed: {user.email}")
+    # A fieldset read may not include the email
+    access_logger.info("User profile accessed: %s", user_id)
     return user
 
 
-def retrieve_users(current_user: User) -> list[User]:
-    """Retrieve all users (restricted to admin users)"""
+async def retrieve_users(
+    current_user: User,
+    limit: int,
+    after: str | None = None,
+    fields: tuple[str, ...] | None = None,
+    filters: UserFilter | None = None,
+    ids: list[ObjectId] | None = None,
+) -> UserCollection:
+    """Retrieve a page of users, or the users with ids (restricted to admin users)"""
     if not current_user.is_admin:
-        logging.warning(f"Unauthorized users list attempt by: {current_user.email}")
+        logger.warning("Unauthorized users list attempt by: %s", current_user.email)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to list users",
             headers={"X-Error": "PERMISSION_DENIED"},
         )
 
-    logging.info(f"Users list accessed by admin: {current_user.email}")
-    return get_users()
+    access_logger.info("Users list accessed by admin: %s", current_user.email)
+    if ids is not None:
+        if after or (filters and filters != UserFilter()):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="ids can't be combined with after or filters",
+                headers={"X-Error": "INVALID_FILTER"},
+            )
+        return await get_users_by_ids(ids, fields)
+    return await get_users(limit, after, fields, filters)
+
+
+async def stream_users(
+    export_format: ExportFormat, after: ObjectId | None = None
+) -> AsyncIterator[str]:
+    """Yield users in _id order, one chunk of rows per cursor batch"""
+    query: dict[str, Any] = {"_id": {"$gt": after}} if after else {}
+    batch_size = settings.EXPORT_BATCH_SIZE
+    cursor = (
+        get_users_collection()
+        .find(query, USER_PROJECTION, batch_size=batch_size)
+        .sort("_id", 1)
+    )
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == "csv" else None
+    if writer:
+        writer.writerow(EXPORT_FIELDS)
+
+    rows = 0
+    try:
+        async for document in cursor:
+            user = serialize_user(document)
+            if writer:
+                writer.writerow([getattr(user, field) for field in EXPORT_FIELDS])
+            else:
+                buffer.write(user.model_dump_json())
+                buffer.write("\n")
+            rows += 1
+            if rows % batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    except Exception as e:
+        # Headers are already sent, so re-raise to make the server abort the
+        # response instead of ending it cleanly: the client sees a truncated
+        # body and resumes with the last id it received
+        logger.error("Database error during users export after %s rows: %s", rows, e)
+        raise
+    finally:
+        await cursor.close()
+
+    logger.info("Users export finished: %s rows", rows)
+
 
+async def export_users(
+    current_user: User, export_format: ExportFormat, after: str | None = None
+) -> AsyncIterator[str]:
+    """Stream all users (restricted to admin users), resumable from an id"""
+    if not current_user.is_admin:
+        logger.warning("Unauthorized users export attempt by: %s", current_user.email)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to export users",
+            headers={"X-Error": "PERMISSION_DENIED"},
+        )
 
-def update_user(current_user: User, user_update: UserBase, user_id: str) -> User:
-    # Security: Only admins or self can update
+    after_id = None
+    if after:
+        try:
+            after_id = ObjectId(after)
+        except (InvalidId, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid user id to resume after",
+                headers={"X-Error": "INVALID_CURSOR"},
+            )
+
+    logger.info("Users export (%s) started by: %s", export_format, current_user.email)
+    return stream_users(export_format, after_id)
+
+
+def mutable_user_filter(
+    current_user: User, user_id: str, action: str
+) -> dict[str, Any]:
+    """Filter matching user_id only while current_user may modify it
+
+    Non-admins may only touch their own account. Their filter also pins the
+    email from the token, so Mongo rechecks ownership in the same operation
+    that writes.
+    """
+    # Security: Only admins or self can modify
     if not current_user.is_admin and current_user.id != user_id:
-        logging.warning(
-            f"Unauthorized update attempt to user {user_id} by {current_user.id}"
+        logger.warning(
+            "Unauthorized %s attempt to user %s by %s", action, user_id, current_user.id
         )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this user",
+            detail=f"Not authorized to {action} this user",
             headers={"X-Error": "PERMISSION_DENIED"},
         )
+    query: dict[str, Any] = {"_id": user_object_id(user_id)}
+    if not current_user.is_admin:
+        query["email"] = current_user.email
+    return query
+
+
+async def update_user(
+    current_user: User,
+    user_update: UserUpdate,
+    user_id: str,
+    if_match: str | None = None,
+) -> User:
+    query = mutable_user_filter(current_user, user_id, "update")
+
+    changes = user_update.changes()
+    if not current_user.is_admin:
+        # Full-profile PUTs echo these back; only a different value is a change
+        for field in ("is_admin", "disabled"):
+            if field in changes and changes[field] == getattr(current_user, field):
+                del changes[field]
+    if not changes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No fields to update",
+            headers={"X-Error": "EMPTY_UPDATE"},
+        )
+    # Security: Only admins can grant admin or (re)enable accounts
+    if not current_user.is_admin and changes.keys() & {"is_admin", "disabled"}:
+        logger.warning("Privilege change attempt by %s", current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to change admin or disabled status",
+            headers={"X-Error": "PERMISSION_DENIED"},
+        )
+
+    logger.info("User update initiated: %s", user_id)
 
-    logging.info(f"User update initiated: {user_id}")
+    if if_match is not None:
+        versions = if_match_versions(if_match, user_id)
+        if versions is not None:
+            # Documents written before versioning have no field and count as 0
+            query["version"] = {"$in": versions + [None] if 0 in versions else versions}
 
+    await check_unique_fields(changes, exclude_id=query["_id"])
     updated = None
 
     try:
-        updated = users_collection.find_one_and_update(
-            {"_id": ObjectId(user_id)},
-            {"$set": user_update.model_dump(exclude={"id"})},
+        updated = await get_users_collection().find_one_and_update(
+            query,
+            {"$set": changes, "$inc": {"version": 1}},
+            projection=USER_PROJECTION,
+            return_document=ReturnDocument.AFTER,
         )
+    except DuplicateKeyError as e:
+        field = duplicate_key_field(e)
+        logger.warning("Update of %s to an existing %s", user_id, field)
+        raise duplicate_field_error(field)
     except Exception as e:
-        logging.error(f"Database error during user update: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to update user",
-        )
+        logger.error("Database error during user update: %s", e)
+        raise database_error(e, "Failed to update user")
     if not updated:
-        logging.warning(f"User to update not found: {user_id}")
+        if "version" in query and await get_user_version(user_id) is not None:
+            logger.warning("Stale If-Match for user update: %s", user_id)
+            raise precondition_failed()
+        logger.warning("User to update not found: %s", user_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found for update",
             headers={"X-Error": "USER_NOT_FOUND"},
         )
 
+    if "email" in changes:
+        # The post-image only has the new email; the old entry is found by id
+        await invalidate_cached_user(updated["email"], user_id=user_id)
+    else:
+        await invalidate_cached_user(updated["email"])
     return serialize_user(updated)
 
 
-def delete_user(current_user: User, user_id: str):
-    user_delete = get_user_by_id(user_id)
-    if not user_delete:
-        logging.warning(f"User not found: {user_id}")
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found",
-            headers={"X-Error": "USER_NOT_FOUND"},
-        )
+async def replace_password_hash(user_id: str, old_hash: str, new_hash: str) -> bool:
+    """Swap a stored hash, unless the password changed since old_hash was read"""
+    result = await get_users_collection().update_one(
+        {"_id": ObjectId(user_id), "password": old_hash},
+        {"$set": {"password": new_hash}},
+    )
+    return result.modified_count == 1
 
-    # Security: Only admins or self can update
-    if not current_user.is_admin and current_user.id != user_delete.id:
-        logging.warning(
-            f"Unauthorized delete attempt to user {user_delete.id} by {current_user.id}"
-        )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete this user",
-            headers={"X-Error": "PERMISSION_DENIED"},
-        )
 
-    logging.info(f"User delete initiated: {user_delete.id}")
+async def delete_user(current_user: User, user_id: str):
+    query = mutable_user_filter(current_user, user_id, "delete")
+
+    logger.info("User delete initiated: %s", user_id)
 
     deleted = None
 
     try:
-        deleted = users_collection.find_one_and_delete(
-            {"_id": ObjectId(user_delete.id)}
+        deleted = await get_users_collection().find_one_and_delete(
+            query, projection={"email": 1}
         )
     except Exception as e:
-        logging.error(f"Database error during user update: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to delete user",
-        )
+        logger.error("Database error during user delete: %s", e)
+        raise database_error(e, "Failed to delete user")
     if not deleted:
-        logging.warning(f"User to delete not found: {user_delete.id}")
+        logger.warning("User to delete not found: %s", user_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found for delete",
             headers={"X-Error": "USER_NOT_FOUND"},
         )
+
+    await invalidate_cached_user(deleted["email"])
@@ -0,0 +1,72 @@
+from typing import Any, Callable
+from urllib.parse import urlencode
+
+from starlette.types import ASGIApp
+
+
+class Response:
+    """Minimal response captured from an in-process ASGI call"""
+
+    def __init__(self, status: int, headers: list[tuple[bytes, bytes]], body: bytes):
+        self.status = status
+        self.headers = {k.decode().lower(): v.decode() for k, v in headers}
+        self.body = body
+
+
+async def call(
+    app: ASGIApp,
+    method: str,
+    path: str,
+    headers: dict[str, str] | None = None,
+    body: bytes = b"",
+    query: dict[str, Any] | None = None,
+    on_body: Callable[[bytes], None] | None = None,
+) -> Response:
+    """Send a single HTTP request to an ASGI app without a network hop
+
+    With on_body, body chunks are handed to the callback instead of being
+    buffered, so streaming responses can be consumed in constant memory.
+    """
+    raw_headers = [(b"host", b"localhost")]
+    raw_headers += [
+        (k.lower().encode(), v.encode()) for k, v in (headers or {}).items()
+    ]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(query or {}, doseq=True).encode(),
+        "root_path": "",
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+    sent = False
+    status = 500
+    response_headers: list[tuple[bytes, bytes]] = []
+    chunks: list[bytes] = []
+
+    async def receive() -> dict[str, Any]:
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status, response_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            if on_body:
+                on_body(message.get("body", b""))
+            else:
+                chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return Response(status, response_headers, b"".join(chunks))
@@ -0,0 +1,88 @@
+"""
+Users/sec of POST /users/import on a synthetic NDJSON payload.
+
+Runs in-process against the Mongo instance in MONGODB_URL (use a throwaway
+database via MONGODB_DB_NAME):
+
+    MONGODB_TLS=false MONGODB_DB_NAME=bench python -m benchmarks.bulk_import \\
+        --records 50000
+
+Throughput is bounded by bcrypt: roughly HASHING_WORKERS divided by the
+time of one hash at the configured cost.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from app.core.hashing import hashing_pool
+from app.core.security import create_access_token
+from app.database.client import get_users_collection
+from app.main import app
+from benchmarks.asgi import call
+
+
+def synthetic_records(count: int, run_id: str) -> bytes:
+    lines = (
+        json.dumps(
+            {
+                "name": "Imported",
+                "surname": "User",
+                "username": f"imp_{run_id}_{i}",
+                "email": f"imp_{run_id}_{i}@example.com",
+                "age": 18 + i % 80,
+                "password": f"ImportPassword{i:06d}",
+            }
+        )
+        for i in range(count)
+    )
+    return "\n".join(lines).encode()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=50_000)
+    args = parser.parse_args()
+
+    run_id = uuid.uuid4().hex[:6]
+    admin_email = f"imp_admin_{run_id}@example.com"
+    await get_users_collection().insert_one(
+        {
+            "name": "Import",
+            "surname": "Admin",
+            "username": f"imp_admin_{run_id}",
+            "email": admin_email,
+            "age": 30,
+            "is_admin": True,
+            "disabled": False,
+            "password": "",
+        }
+    )
+    token = create_access_token({"sub": admin_email})
+    body = synthetic_records(args.records, run_id)
+
+    start = time.perf_counter()
+    response = await call(
+        app,
+        "POST",
+        "/users/import",
+        headers={
+            "authorization": f"Bearer {token}",
+            "content-type": "application/x-ndjson",
+        },
+        body=body,
+    )
+    elapsed = time.perf_counter() - start
+    report = json.loads(response.body)
+
+    print(f"status:        {response.status}")
+    print(f"created:       {report.get('created')}")
+    print(f"hash workers:  {hashing_pool.workers} ({hashing_pool.executor})")
+    print(f"elapsed:       {elapsed:.1f}s")
+    print(f"throughput:    {args.records / elapsed:.1f} users/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
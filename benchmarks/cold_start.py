@@ -0,0 +1,118 @@
+"""
+Cold-start time to first response of the Lambda handler.
+
+Each run starts a fresh interpreter, imports app.main and sends the sample
+API Gateway event in tests/lambda/test_main.json through the Mangum
+handler. Exits non-zero when the median exceeds --threshold-ms:
+
+    python -m benchmarks.cold_start --runs 10 --threshold-ms 1500
+    python -m benchmarks.cold_start --importtime   # slowest imports
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+EVENT = ROOT / "tests" / "lambda" / "test_main.json"
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from app.main import handler
+imported = time.perf_counter()
+response = handler(json.load(open(sys.argv[1])), {})
+done = time.perf_counter()
+print(json.dumps({
+    "status": response["statusCode"],
+    "import_ms": (imported - start) * 1000,
+    "handler_ms": (done - imported) * 1000,
+}))
+"""
+
+
+def child_env() -> dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "cold-start-benchmark-secret-key-0123456789")
+    env.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+    env.setdefault("AWS_LAMBDA_FUNCTION_NAME", "cold-start-benchmark")
+    # Mirrors the recommended Lambda setup: indexes are managed on deploy
+    env.setdefault("ENSURE_INDEXES_ON_STARTUP", "false")
+    env["PYTHONPATH"] = str(ROOT)
+    return env
+
+
+def run_once() -> dict[str, float]:
+    """Spawn a fresh interpreter and time it up to the first response"""
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, str(EVENT)],
+        env=child_env(),
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_ms = (time.perf_counter() - start) * 1000
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    result["total_ms"] = total_ms
+    return result
+
+
+def print_importtime(top: int) -> None:
+    """Show the slowest modules by cumulative import time"""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=child_env(),
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in output.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    rows.sort(reverse=True)
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for cumulative_us, self_us, name in rows[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--threshold-ms", type=float, default=1500.0)
+    parser.add_argument("--importtime", action="store_true")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.importtime:
+        print_importtime(args.top)
+        return
+
+    results = [run_once() for _ in range(args.runs)]
+    for key in ("import_ms", "handler_ms", "total_ms"):
+        values = [result[key] for result in results]
+        print(
+            f"{key:>11}: median {statistics.median(values):8.1f}  "
+            f"min {min(values):8.1f}  max {max(values):8.1f}"
+        )
+
+    median_total = statistics.median(result["total_ms"] for result in results)
+    if median_total > args.threshold_ms:
+        print(f"REGRESSION: median {median_total:.1f} ms > {args.threshold_ms} ms")
+        sys.exit(1)
+    print(f"OK: median {median_total:.1f} ms <= {args.threshold_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Requests/sec of an authenticated route at increasing client concurrency.
+
+Runs the FastAPI app in-process against the Mongo instance in MONGODB_URL
+(e.g. the one from docker-compose.yml with MONGODB_TLS=false):
+
+    python -m benchmarks.concurrency --levels 1 16 128 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlencode
+
+from app.main import app
+from benchmarks.asgi import call
+
+BENCH_USER = {
+    "name": "bench",
+    "surname": "user",
+    "username": "bench_user",
+    "email": "bench_user@example.com",
+    "age": 30,
+    "is_admin": False,
+    "disabled": False,
+    "password": "BenchPassword123",
+}
+
+
+async def get_token() -> str:
+    """Register (if needed) and log in the benchmark user"""
+    await call(
+        app,
+        "POST",
+        "/users/register",
+        headers={"content-type": "application/json"},
+        body=json.dumps(BENCH_USER).encode(),
+    )
+    response = await call(
+        app,
+        "POST",
+        "/users/login",
+        headers={"content-type": "application/x-www-form-urlencoded"},
+        body=urlencode(
+            {"email": BENCH_USER["email"], "password": BENCH_USER["password"]}
+        ).encode(),
+    )
+    if response.status != 200:
+        raise RuntimeError(f"Login failed: {response.status} {response.body!r}")
+    return json.loads(response.body)["access_token"]
+
+
+async def run_level(path: str, token: str, concurrency: int, duration: float) -> float:
+    """Hammer `path` with `concurrency` clients for `duration` seconds"""
+    headers = {"authorization": f"Bearer {token}"}
+    deadline = time.perf_counter() + duration
+    completed = 0
+
+    async def client() -> None:
+        nonlocal completed
+        while time.perf_counter() < deadline:
+            response = await call(app, "GET", path, headers=headers)
+            if response.status != 200:
+                raise RuntimeError(f"Unexpected status {response.status}")
+            completed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return completed / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 16, 128])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--path", default="/users/me")
+    args = parser.parse_args()
+
+    token = await get_token()
+    print(f"{'clients':>8} {'req/s':>10}")
+    for level in args.levels:
+        rps = await run_level(args.path, token, level, args.duration)
+        print(f"{level:>8} {rps:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
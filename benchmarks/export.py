@@ -0,0 +1,90 @@
+"""
+Throughput and peak RSS of the streaming users export.
+
+Seeds synthetic users into the Mongo instance in MONGODB_URL (use a
+throwaway database via MONGODB_DB_NAME) and streams them back through
+GET /users/export in-process:
+
+    MONGODB_TLS=false MONGODB_DB_NAME=bench python -m benchmarks.export \\
+        --seed 1000000 --format ndjson
+"""
+
+import argparse
+import asyncio
+import resource
+import time
+
+from app.core.security import create_access_token
+from app.database.client import get_users_collection
+from app.main import app
+from benchmarks.asgi import call
+
+ADMIN_EMAIL = "bench_admin@example.com"
+
+
+def synthetic_user(i: int) -> dict[str, object]:
+    return {
+        "name": "Synthetic",
+        "surname": "User",
+        "username": f"synthetic_{i}",
+        "email": f"synthetic_{i}@example.com",
+        "age": 18 + i % 80,
+        "is_admin": i == 0,
+        "disabled": False,
+        "password": "$2b$12$" + "x" * 53,
+    }
+
+
+async def seed(count: int, chunk: int = 10_000) -> None:
+    """Insert `count` synthetic users, plus the admin used for the export"""
+    await get_users_collection().insert_one(
+        synthetic_user(0) | {"email": ADMIN_EMAIL, "username": "bench_admin"}
+    )
+    for start in range(1, count, chunk):
+        batch = [synthetic_user(i) for i in range(start, min(start + chunk, count))]
+        await get_users_collection().insert_many(batch, ordered=False)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    args = parser.parse_args()
+
+    if args.seed:
+        start = time.perf_counter()
+        await seed(args.seed)
+        print(f"seeded {args.seed} users in {time.perf_counter() - start:.1f}s")
+
+    token = create_access_token({"sub": ADMIN_EMAIL})
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    received = {"bytes": 0, "rows": 0}
+
+    def consume(chunk: bytes) -> None:
+        received["bytes"] += len(chunk)
+        received["rows"] += chunk.count(b"\n")
+
+    start = time.perf_counter()
+    response = await call(
+        app,
+        "GET",
+        "/users/export",
+        headers={"authorization": f"Bearer {token}"},
+        query={"format": args.format},
+        on_body=consume,
+    )
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(f"status:      {response.status}")
+    print(f"rows:        {received['rows']}")
+    print(f"bytes:       {received['bytes']}")
+    print(f"elapsed:     {elapsed:.2f}s")
+    print(f"throughput:  {received['rows'] / elapsed:.0f} rows/s")
+    print(
+        f"peak RSS:    {rss_after / 1024:.1f} MiB (before export {rss_before / 1024:.1f})"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,441 @@
+"""
+In-process stand-in for the subset of the async PyMongo API the app uses.
+
+It keeps documents in a list, honours unique indexes and can simulate a
+network round trip per operation, so benchmarks and load tests can run
+without a mongod. Patch it in with `use_inmemory_database()`.
+"""
+
+import asyncio
+import copy
+import re
+from typing import Any, Iterable
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.database import client
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id: Any) -> None:
+        self.inserted_id = inserted_id
+
+
+class InsertManyResult:
+    def __init__(self, inserted_ids: list[Any]) -> None:
+        self.inserted_ids = inserted_ids
+
+
+class UpdateResult:
+    def __init__(self, matched_count: int, upserted_id: Any = None) -> None:
+        self.matched_count = matched_count
+        self.modified_count = matched_count
+        self.upserted_id = upserted_id
+
+
+class DeleteResult:
+    def __init__(self, deleted_count: int) -> None:
+        self.deleted_count = deleted_count
+
+
+def _compare(value: Any, operator: str, argument: Any) -> bool:
+    if operator == "$eq":
+        return value == argument
+    if operator == "$ne":
+        return value != argument
+    if operator == "$in":
+        return value in argument
+    if operator == "$nin":
+        return value not in argument
+    if operator == "$exists":
+        return (value is not None) == bool(argument)
+    if operator == "$regex":
+        return isinstance(value, str) and re.search(argument, value) is not None
+    if value is None:
+        return False
+    if operator == "$gt":
+        return value > argument
+    if operator == "$gte":
+        return value >= argument
+    if operator == "$lt":
+        return value < argument
+    if operator == "$lte":
+        return value <= argument
+    raise NotImplementedError(f"Query operator {operator} is not supported")
+
+
+def matches(document: dict[str, Any], query: dict[str, Any]) -> bool:
+    """Evaluate a Mongo filter against a document"""
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(matches(document, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(document, sub) for sub in condition):
+                return False
+        elif (
+            isinstance(condition, dict)
+            and condition
+            and all(op.startswith("$") for op in condition)
+        ):
+            value = document.get(key)
+            if not all(
+                _compare(value, op, arg)
+                for op, arg in condition.items()
+                if op != "$options"
+            ):
+                return False
+        elif document.get(key) != condition:
+            return False
+    return True
+
+
+def project(
+    document: dict[str, Any], projection: dict[str, Any] | None
+) -> dict[str, Any]:
+    if not projection:
+        return copy.deepcopy(document)
+    included = {key for key, flag in projection.items() if flag}
+    if included:
+        result = {
+            key: document[key] for key in included if key != "_id" and key in document
+        }
+        if projection.get("_id", 1):
+            result["_id"] = document["_id"]
+        return copy.deepcopy(result)
+    return copy.deepcopy(
+        {key: value for key, value in document.items() if key not in projection}
+    )
+
+
+def _hashable(value: Any) -> Any:
+    return repr(value) if isinstance(value, (dict, list)) else value
+
+
+def apply_update(document: dict[str, Any], update: dict[str, Any]) -> None:
+    for operator, fields in update.items():
+        for key, value in fields.items():
+            if operator == "$set":
+                document[key] = value
+            elif operator == "$inc":
+                document[key] = document.get(key, 0) + value
+            elif operator == "$unset":
+                document.pop(key, None)
+            elif operator != "$setOnInsert":
+                raise NotImplementedError(f"Update operator {operator}")
+
+
+class InMemoryCursor:
+    def __init__(
+        self,
+        collection: "InMemoryCollection",
+        documents: list[dict[str, Any]],
+        projection: dict[str, Any] | None = None,
+    ) -> None:
+        self._collection = collection
+        self._documents = documents
+        self._projection = projection
+        self._limit = 0
+
+    def sort(self, key: Any, direction: int = 1) -> "InMemoryCursor":
+        keys = [(key, direction)] if isinstance(key, str) else list(key)
+        for field, field_direction in reversed(keys):
+            self._documents.sort(
+                key=lambda document: (
+                    document.get(field) is not None,
+                    document.get(field),
+                ),
+                reverse=field_direction < 0,
+            )
+        return self
+
+    def limit(self, limit: int) -> "InMemoryCursor":
+        self._limit = limit
+        return self
+
+    def batch_size(self, batch_size: int) -> "InMemoryCursor":
+        return self
+
+    def _results(self) -> list[dict[str, Any]]:
+        documents = self._documents[: self._limit] if self._limit else self._documents
+        return [project(document, self._projection) for document in documents]
+
+    async def to_list(self, length: int | None = None) -> list[dict[str, Any]]:
+        await self._collection._round_trip()
+        return self._results()[:length] if length else self._results()
+
+    def __aiter__(self) -> "InMemoryCursor":
+        self._iterator = iter(self._results())
+        return self
+
+    async def __anext__(self) -> dict[str, Any]:
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryCollection:
+    def __init__(self, name: str, latency: float = 0.0) -> None:
+        self.name = name
+        self.latency = latency
+        self.documents: list[dict[str, Any]] = []
+        self.indexes: dict[str, dict[str, Any]] = {}
+        # Unique index name -> index key -> stored document
+        self._unique: dict[str, dict[tuple[Any, ...], dict[str, Any]]] = {}
+        self._declare_index("_id_", [("_id", 1)], unique=True)
+
+    async def _round_trip(self) -> None:
+        await asyncio.sleep(self.latency)
+
+    def _fields(self, name: str) -> list[str]:
+        return [field for field, _ in self.indexes[name]["key"]]
+
+    def _key(self, document: dict[str, Any], name: str) -> tuple[Any, ...]:
+        return tuple(_hashable(document.get(field)) for field in self._fields(name))
+
+    def _declare_index(self, name: str, key: list[Any], **options: Any) -> None:
+        self.indexes[name] = {"key": key, **options}
+        if not options.get("unique"):
+            return
+        entries: dict[tuple[Any, ...], dict[str, Any]] = {}
+        for document in self.documents:
+            index_key = self._key(document, name)
+            if index_key in entries:
+                raise self._duplicate(name, index_key)
+            entries[index_key] = document
+        self._unique[name] = entries
+
+    def _duplicate(self, name: str, key: tuple[Any, ...]) -> DuplicateKeyError:
+        fields = self._fields(name)
+        return DuplicateKeyError(
+            f"E11000 duplicate key error collection: {self.name} index: {name}",
+            11000,
+            {
+                "keyPattern": {field: 1 for field in fields},
+                "keyValue": dict(zip(fields, key)),
+            },
+        )
+
+    def _check_unique(
+        self, candidate: dict[str, Any], ignore: dict[str, Any] | None = None
+    ) -> None:
+        for name, entries in self._unique.items():
+            key = self._key(candidate, name)
+            existing = entries.get(key)
+            if existing is not None and existing is not ignore:
+                raise self._duplicate(name, key)
+
+    def _index_add(self, document: dict[str, Any]) -> None:
+        for name, entries in self._unique.items():
+            entries[self._key(document, name)] = document
+
+    def _index_remove(self, document: dict[str, Any]) -> None:
+        for name, entries in self._unique.items():
+            entries.pop(self._key(document, name), None)
+
+    def _insert(self, document: dict[str, Any]) -> Any:
+        document.setdefault("_id", ObjectId())
+        stored = copy.deepcopy(document)
+        self._check_unique(stored)
+        self.documents.append(stored)
+        self._index_add(stored)
+        return document["_id"]
+
+    def _replace(self, document: dict[str, Any], updated: dict[str, Any]) -> None:
+        self._check_unique(updated, ignore=document)
+        self._index_remove(document)
+        document.clear()
+        document.update(updated)
+        self._index_add(document)
+
+    def _remove(self, document: dict[str, Any]) -> None:
+        self._index_remove(document)
+        self.documents.remove(document)
+
+    def _candidates(self, query: dict[str, Any]) -> Iterable[dict[str, Any]]:
+        # Equality or $in on a unique single-field index is a hash lookup per
+        # value, like an index point query; everything else is a collection scan
+        for name, entries in self._unique.items():
+            fields = self._fields(name)
+            if len(fields) == 1 and fields[0] in query:
+                value = query[fields[0]]
+                if not isinstance(value, dict):
+                    values = [value]
+                elif list(value) == ["$in"]:
+                    values = value["$in"]
+                else:
+                    continue
+                found = (entries.get((_hashable(item),)) for item in values)
+                return [document for document in found if document is not None]
+        return self.documents
+
+    def _first(self, query: dict[str, Any] | None) -> dict[str, Any] | None:
+        query = query or {}
+        return next(
+            (doc for doc in self._candidates(query) if matches(doc, query)), None
+        )
+
+    def find(
+        self,
+        filter: dict[str, Any] | None = None,
+        projection: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> InMemoryCursor:
+        query = filter or {}
+        found = [doc for doc in self._candidates(query) if matches(doc, query)]
+        cursor = InMemoryCursor(self, found, projection)
+        if sort := kwargs.get("sort"):
+            cursor.sort(sort)
+        if limit := kwargs.get("limit"):
+            cursor.limit(limit)
+        return cursor
+
+    async def find_one(
+        self,
+        filter: dict[str, Any] | None = None,
+        projection: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> dict[str, Any] | None:
+        await self._round_trip()
+        document = self._first(filter)
+        return project(document, projection) if document else None
+
+    async def count_documents(self, filter: dict[str, Any], **kwargs: Any) -> int:
+        await self._round_trip()
+        return sum(1 for doc in self.documents if matches(doc, filter))
+
+    async def estimated_document_count(self, **kwargs: Any) -> int:
+        await self._round_trip()
+        return len(self.documents)
+
+    async def insert_one(
+        self, document: dict[str, Any], **kwargs: Any
+    ) -> InsertOneResult:
+        await self._round_trip()
+        return InsertOneResult(self._insert(document))
+
+    async def insert_many(
+        self, documents: Iterable[dict[str, Any]], ordered: bool = True, **kwargs: Any
+    ) -> InsertManyResult:
+        await self._round_trip()
+        inserted, errors = [], []
+        for index, document in enumerate(documents):
+            try:
+                inserted.append(self._insert(document))
+            except DuplicateKeyError as e:
+                errors.append(
+                    {"index": index, "code": 11000, "errmsg": str(e)}
+                    | (e.details or {})
+                )
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(inserted)})
+        return InsertManyResult(inserted)
+
+    async def update_one(
+        self,
+        filter: dict[str, Any],
+        update: dict[str, Any],
+        upsert: bool = False,
+        **kwargs: Any,
+    ) -> UpdateResult:
+        await self._round_trip()
+        document = self._first(filter)
+        if document is None:
+            if not upsert:
+                return UpdateResult(0)
+            document = {
+                key: value for key, value in filter.items() if not key.startswith("$")
+            }
+            document.update(update.get("$setOnInsert", {}))
+            apply_update(document, update)
+            return UpdateResult(0, self._insert(document))
+        updated = copy.deepcopy(document)
+        apply_update(updated, update)
+        self._replace(document, updated)
+        return UpdateResult(1)
+
+    async def find_one_and_update(
+        self,
+        filter: dict[str, Any],
+        update: dict[str, Any],
+        projection: dict[str, Any] | None = None,
+        return_document: bool = ReturnDocument.BEFORE,
+        **kwargs: Any,
+    ) -> dict[str, Any] | None:
+        await self._round_trip()
+        document = self._first(filter)
+        if document is None:
+            return None
+        before = project(document, projection)
+        updated = copy.deepcopy(document)
+        apply_update(updated, update)
+        self._replace(document, updated)
+        return project(document, projection) if return_document else before
+
+    async def find_one_and_delete(
+        self,
+        filter: dict[str, Any],
+        projection: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> dict[str, Any] | None:
+        await self._round_trip()
+        document = self._first(filter)
+        if document is None:
+            return None
+        self._remove(document)
+        return project(document, projection)
+
+    async def delete_one(self, filter: dict[str, Any], **kwargs: Any) -> DeleteResult:
+        await self._round_trip()
+        document = self._first(filter)
+        if document is None:
+            return DeleteResult(0)
+        self._remove(document)
+        return DeleteResult(1)
+
+    async def delete_many(self, filter: dict[str, Any], **kwargs: Any) -> DeleteResult:
+        await self._round_trip()
+        doomed = [doc for doc in self.documents if matches(doc, filter)]
+        for document in doomed:
+            self._remove(document)
+        return DeleteResult(len(doomed))
+
+    async def create_indexes(self, indexes: list[Any], **kwargs: Any) -> list[str]:
+        await self._round_trip()
+        for index in indexes:
+            options = dict(index.document)
+            key = list(options.pop("key").items())
+            self._declare_index(options.pop("name"), key, **options)
+        return [index.document["name"] for index in indexes]
+
+    async def index_information(self) -> dict[str, dict[str, Any]]:
+        await self._round_trip()
+        return copy.deepcopy(self.indexes)
+
+
+class InMemoryDatabase:
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.collections: dict[str, InMemoryCollection] = {}
+
+    def get_collection(self, name: str) -> InMemoryCollection:
+        if name not in self.collections:
+            self.collections[name] = InMemoryCollection(name, self.latency)
+        return self.collections[name]
+
+    __getitem__ = get_collection
+
+
+def use_inmemory_database(latency: float = 0.0) -> InMemoryDatabase:
+    """Route every collection lookup in the app to a fresh in-memory database"""
+    database = InMemoryDatabase(latency)
+    client.get_database = lambda: database  # type: ignore[assignment,return-value]
+    return database
@@ -0,0 +1,406 @@
+"""
+Load generator that replays the Bruno collection (bruno/fastapi-mongo) as a
+weighted mix of flows and reports latency percentiles per route.
+
+Transports:
+  asgi    drive app.main.app in-process (no network)
+  http    talk HTTP/1.1 keep-alive to a running server, e.g. local uvicorn
+  mangum  send API Gateway events through app.main.handler, one invocation at
+          a time like a single Lambda execution environment
+
+asgi and mangum use the in-process Mongo stand-in unless --mongo is given;
+--latency-ms simulates the database round trip:
+
+    python -m benchmarks.loadgen --transport asgi --concurrency 32 --duration 20
+    python -m benchmarks.loadgen --transport mangum --duration 20
+    python -m benchmarks.loadgen --transport http --url http://127.0.0.1:8000 \\
+        --mix me=60,get_user=20,login=5,root=15
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack
+from typing import Any
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.asgi import Response, call
+
+DEFAULT_MIX = (
+    "me=35,get_user=20,get_users=10,update_user=10,login=5,root=10,"
+    "register=5,delete_user=5"
+)
+PASSWORD = "A1234567891011"
+
+
+class Transport:
+    async def request(
+        self,
+        method: str,
+        path: str,
+        headers: dict[str, str] | None = None,
+        body: bytes = b"",
+        query: dict[str, Any] | None = None,
+    ) -> Response:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class ASGITransport(Transport):
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def request(self, method, path, headers=None, body=b"", query=None):
+        return await call(self.app, method, path, headers, body, query)
+
+
+class HTTPTransport(Transport):
+    """Minimal HTTP/1.1 keep-alive client: one connection per virtual user"""
+
+    def __init__(self, url: str) -> None:
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.connections: dict[int, tuple[Any, Any]] = {}
+
+    async def _connection(self) -> tuple[Any, Any]:
+        task = id(asyncio.current_task())
+        if task not in self.connections:
+            self.connections[task] = await asyncio.open_connection(self.host, self.port)
+        return self.connections[task]
+
+    async def request(self, method, path, headers=None, body=b"", query=None):
+        reader, writer = await self._connection()
+        target = path + (f"?{urlencode(query, doseq=True)}" if query else "")
+        lines = [f"{method} {target} HTTP/1.1", f"host: {self.host}"]
+        lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        lines.append(f"content-length: {len(body)}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        await writer.drain()
+
+        status = int((await reader.readline()).split()[1])
+        response_headers: list[tuple[bytes, bytes]] = []
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode().partition(":")
+            response_headers.append((name.strip().encode(), value.strip().encode()))
+        header_map = {k.lower(): v for k, v in response_headers}
+
+        if header_map.get(b"transfer-encoding") == b"chunked":
+            content = b""
+            while size := int((await reader.readline()).strip(), 16):
+                content += await reader.readexactly(size)
+                await reader.readline()
+            await reader.readline()
+        else:
+            length = int(header_map.get(b"content-length", b"0"))
+            content = await reader.readexactly(length) if length else b""
+        return Response(status, response_headers, content)
+
+    async def close(self) -> None:
+        for _, writer in self.connections.values():
+            writer.close()
+
+
+class MangumTransport(Transport):
+    """API Gateway (REST) events through the Lambda handler on one thread
+
+    The handler drives its own event loop with run_until_complete, so it
+    runs on a dedicated thread that keeps one loop, like a warm Lambda
+    execution environment serving one request at a time.
+    """
+
+    def __init__(self, handler: Any) -> None:
+        self.handler = handler
+        self.executor = ThreadPoolExecutor(
+            max_workers=1,
+            initializer=lambda: asyncio.set_event_loop(asyncio.new_event_loop()),
+        )
+        self.lock = asyncio.Lock()
+
+    def _event(self, method, path, headers, body, query) -> dict[str, Any]:
+        return {
+            "resource": "/{proxy+}",
+            "path": path,
+            "httpMethod": method,
+            "headers": {"Host": "localhost", **(headers or {})},
+            "multiValueHeaders": {},
+            "queryStringParameters": query or None,
+            "multiValueQueryStringParameters": None,
+            "requestContext": {
+                "httpMethod": method,
+                "resourcePath": "/{proxy+}",
+                "identity": {"sourceIp": "127.0.0.1"},
+            },
+            "body": base64.b64encode(body).decode() if body else None,
+            "isBase64Encoded": bool(body),
+        }
+
+    async def request(self, method, path, headers=None, body=b"", query=None):
+        event = self._event(method, path, headers, body, query)
+        loop = asyncio.get_running_loop()
+        async with self.lock:
+            result = await loop.run_in_executor(self.executor, self.handler, event, {})
+        content = result.get("body") or ""
+        raw = (
+            base64.b64decode(content)
+            if result.get("isBase64Encoded")
+            else content.encode()
+        )
+        headers_out = [
+            (k.encode(), v.encode()) for k, v in (result.get("headers") or {}).items()
+        ]
+        return Response(result["statusCode"], headers_out, raw)
+
+    async def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, route: str, status: int, seconds: float) -> None:
+        self.latencies[route].append(seconds * 1000)
+        self.statuses[route][status] += 1
+
+    def report(self, elapsed: float) -> dict[str, Any]:
+        routes = {}
+        all_samples = []
+        for route, samples in sorted(self.latencies.items()):
+            all_samples += samples
+            routes[route] = summarize(samples, elapsed) | {
+                "statuses": dict(self.statuses[route])
+            }
+        return {
+            "elapsed_s": elapsed,
+            "total": summarize(all_samples, elapsed),
+            "routes": routes,
+        }
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def summarize(samples: list[float], elapsed: float) -> dict[str, float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "rps": len(ordered) / elapsed,
+        "mean_ms": statistics.fmean(ordered),
+        "p50_ms": percentile(ordered, 0.50),
+        "p95_ms": percentile(ordered, 0.95),
+        "p99_ms": percentile(ordered, 0.99),
+    }
+
+
+class Session:
+    """A virtual client following the flows in the Bruno collection"""
+
+    def __init__(self, transport: Transport, stats: Stats, run_id: str, n: int):
+        self.transport = transport
+        self.stats = stats
+        self.run_id = run_id
+        self.n = n
+        self.generation = 0
+        self.user_id = ""
+        self.token = ""
+
+    async def send(self, route: str, method: str, path: str, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        response = await self.transport.request(method, path, **kwargs)
+        self.stats.record(route, response.status, time.perf_counter() - start)
+        return response
+
+    @property
+    def auth(self) -> dict[str, str]:
+        return {"authorization": f"Bearer {self.token}"}
+
+    def profile(self, suffix: str) -> dict[str, Any]:
+        return {
+            "name": "load",
+            "surname": "generator",
+            "username": f"lg{self.run_id}{suffix}",
+            "email": f"lg{self.run_id}{suffix}@example.com",
+            "age": 30,
+            "is_admin": True,
+            "disabled": False,
+        }
+
+    async def register(self, suffix: str) -> Any:
+        return await self.send(
+            "POST /users/register",
+            "POST",
+            "/users/register",
+            headers={"content-type": "application/json"},
+            body=json.dumps(self.profile(suffix) | {"password": PASSWORD}).encode(),
+        )
+
+    async def login(self) -> None:
+        response = await self.send(
+            "POST /users/login",
+            "POST",
+            "/users/login",
+            headers={"content-type": "application/x-www-form-urlencoded"},
+            body=urlencode(
+                {"email": self.profile(self.suffix)["email"], "password": PASSWORD}
+            ).encode(),
+        )
+        if response.status == 200:
+            self.token = json.loads(response.body)["access_token"]
+
+    @property
+    def suffix(self) -> str:
+        return f"{self.n}g{self.generation}"
+
+    async def start(self) -> None:
+        response = await self.register(self.suffix)
+        if response.status == 201:
+            self.user_id = json.loads(response.body)["id"]
+        await self.login()
+
+    async def step(self, flow: str) -> None:
+        if flow == "root":
+            await self.send("GET /", "GET", "/")
+        elif flow == "login":
+            await self.login()
+        elif flow == "me":
+            await self.send("GET /users/me", "GET", "/users/me", headers=self.auth)
+        elif flow == "get_user":
+            await self.send(
+                "GET /users/{user_id}",
+                "GET",
+                f"/users/{self.user_id}",
+                headers=self.auth,
+            )
+        elif flow == "get_users":
+            await self.send("GET /users/", "GET", "/users/", headers=self.auth)
+        elif flow == "update_user":
+            await self.send(
+                "PUT /users/{user_id}",
+                "PUT",
+                f"/users/{self.user_id}",
+                headers=self.auth | {"content-type": "application/json"},
+                body=json.dumps(
+                    self.profile(self.suffix) | {"age": random.randint(18, 90)}
+                ).encode(),
+            )
+        elif flow == "register":
+            await self.register(f"{self.n}r{uuid.uuid4().hex[:6]}")
+        elif flow == "delete_user":
+            await self.send(
+                "DELETE /users/{user_id}",
+                "DELETE",
+                f"/users/{self.user_id}",
+                headers=self.auth,
+            )
+            self.generation += 1
+            await self.start()
+
+
+def parse_mix(mix: str) -> tuple[list[str], list[float]]:
+    flows, weights = [], []
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        flows.append(name.strip())
+        weights.append(float(weight or 1))
+    return flows, weights
+
+
+async def run_load(
+    transport: Transport, concurrency: int, duration: float, mix: str
+) -> dict[str, Any]:
+    flows, weights = parse_mix(mix)
+    stats = Stats()
+    run_id = uuid.uuid4().hex[:5]
+    sessions = [Session(transport, stats, run_id, n) for n in range(concurrency)]
+    for session in sessions:
+        await session.start()
+
+    measured = Stats()
+    for session in sessions:
+        session.stats = measured
+    deadline = time.perf_counter() + duration
+
+    async def worker(session: Session) -> None:
+        while time.perf_counter() < deadline:
+            await session.step(random.choices(flows, weights)[0])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(session) for session in sessions))
+    return measured.report(time.perf_counter() - start)
+
+
+def print_report(report: dict[str, Any]) -> None:
+    header = f"{'route':<26} {'count':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8}"
+    print(header + f" {'p99 ms':>8}  statuses")
+    rows = list(report["routes"].items()) + [("TOTAL", report["total"])]
+    for route, row in rows:
+        if not row.get("count"):
+            continue
+        statuses = ",".join(f"{k}:{v}" for k, v in row.get("statuses", {}).items())
+        print(
+            f"{route:<26} {row['count']:>7} {row['rps']:>8.1f} {row['p50_ms']:>8.2f} "
+            f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}  {statuses}"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--transport", choices=["asgi", "http", "mangum"])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--mongo", action="store_true")
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+    transport_name = args.transport or "asgi"
+
+    async with AsyncExitStack() as stack:
+        transport: Transport
+        if transport_name == "http":
+            transport = HTTPTransport(args.url)
+        else:
+            if not args.mongo:
+                from benchmarks.inmemory import use_inmemory_database
+
+                use_inmemory_database(latency=args.latency_ms / 1000)
+            from app.main import app, handler
+
+            if transport_name == "asgi":
+                await stack.enter_async_context(app.router.lifespan_context(app))
+                transport = ASGITransport(app)
+            else:
+                if args.concurrency != 1:
+                    print("mangum: one invocation at a time, using concurrency 1")
+                    args.concurrency = 1
+                transport = MangumTransport(handler)
+        stack.push_async_callback(transport.close)
+
+        report = await run_load(transport, args.concurrency, args.duration, args.mix)
+
+    print(f"transport={transport_name} concurrency={args.concurrency}")
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""
+Caller-side cost of a hot-path log call under each logging mode: the time
+the request handler spends in logger.info(), not the writer thread's time.
+
+--sink-delay-us simulates a stdout that blocks (a full pipe to a log
+shipper) by sleeping on every write:
+
+    python -m benchmarks.logging_pipeline --iterations 20000
+    python -m benchmarks.logging_pipeline --sink-delay-us 50
+"""
+
+import argparse
+import io
+import logging
+import sys
+import time
+from typing import Any
+
+from app.core import logs
+
+ACCESS_LOGGER = "app.services.users.access"
+
+
+class Sink(io.TextIOBase):
+    """Discards output, optionally after a per-write delay"""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+
+    def write(self, text: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        return len(text)
+
+
+MODES: dict[str, dict[str, Any]] = {
+    "sync text": {"log_format": "text", "use_queue": False, "sample_rates": {}},
+    "sync json": {"log_format": "json", "use_queue": False, "sample_rates": {}},
+    "queue text": {"log_format": "text", "use_queue": True, "sample_rates": {}},
+    "queue json": {"log_format": "json", "use_queue": True, "sample_rates": {}},
+    "queue json sampled": {
+        "log_format": "json",
+        "use_queue": True,
+        "sample_rates": {ACCESS_LOGGER: 0.1},
+    },
+}
+
+
+def measure(mode: dict[str, Any], iterations: int, delay: float) -> float:
+    """Average microseconds per log call, seen from the calling thread"""
+    stdout = sys.stdout
+    sys.stdout = Sink(delay)
+    try:
+        logs.configure_logging(level="INFO", **mode)
+        logger = logging.getLogger(ACCESS_LOGGER)
+        start = time.perf_counter()
+        for i in range(iterations):
+            logger.info("User profile accessed: %s", f"user{i}@example.com")
+        elapsed = time.perf_counter() - start
+        logs.stop_logging()
+    finally:
+        sys.stdout = stdout
+    return elapsed / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--sink-delay-us", type=float, default=0.0)
+    args = parser.parse_args()
+
+    print(f"{'mode':>20} {'us/call':>10}")
+    for name, mode in MODES.items():
+        result = measure(mode, args.iterations, args.sink_delay_us / 1e6)
+        print(f"{name:>20} {result:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
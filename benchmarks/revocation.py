@@ -0,0 +1,87 @@
+"""
+Memory and per-request cost of access token revocation.
+
+Compares the Bloom filter each process keeps with an exact set of the same
+keys, measures the filter's real false positive rate, and times the check
+get_current_user now makes on every request (a filter miss, the common case):
+
+    python -m benchmarks.revocation --keys 1000000
+    python -m benchmarks.revocation --keys 1000000 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+
+from app.core import security
+from app.core.bloom import BloomFilter
+from app.core.config import settings
+from app.services import revocations
+from benchmarks.inmemory import use_inmemory_database
+
+
+def revoked_keys(count: int) -> list[str]:
+    return [revocations.token_key(uuid.uuid4().hex) for _ in range(count)]
+
+
+def memory(keys: list[str], error_rate: float) -> None:
+    # An exact set has to keep every key string alive as well as its table
+    set_bytes = sys.getsizeof(set(keys)) + sum(sys.getsizeof(key) for key in keys)
+
+    bloom = BloomFilter(len(keys), error_rate)
+    for key in keys:
+        bloom.add(key)
+    probes = revoked_keys(100_000)
+    false_positives = sum(key in bloom for key in probes)
+
+    per_million = 1_000_000 / len(keys)
+    print(f"keys                     {len(keys):>12,}")
+    print(f"set of keys, MB/1M       {set_bytes * per_million / 2**20:>12.1f}")
+    print(f"bloom filter, MB/1M      {bloom.nbytes * per_million / 2**20:>12.2f}")
+    print(f"bloom hashes             {bloom.hashes:>12}")
+    print(f"false positive rate      {false_positives / len(probes):>12.4%}")
+
+
+def per_request(iterations: int) -> None:
+    async def run() -> None:
+        use_inmemory_database()
+        token = security.create_access_token({"sub": "bench@example.com"})
+        token_data = await security.get_current_user(token)
+        await revocations.revocation_list.sync()
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await revocations.is_token_revoked(token_data)
+        check = (time.perf_counter() - start) / iterations
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await security.get_current_user(token)
+        cached = (time.perf_counter() - start) / iterations
+
+        print(f"revocation check, us     {check * 1e6:>12.2f}")
+        print(f"get_current_user, us     {cached * 1e6:>12.2f}")
+        print("  (token cache hit, including the revocation check)")
+
+    asyncio.run(run())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    parser.add_argument(
+        "--error-rate", type=float, default=settings.REVOCATION_FILTER_ERROR_RATE
+    )
+    parser.add_argument("--iterations", type=int, default=50_000)
+    args = parser.parse_args()
+
+    memory(revoked_keys(args.keys), args.error_rate)
+    per_request(args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Per-document cost of turning Mongo documents into a JSON response body,
+strict (full validation + FastAPI's response_model pass) versus the
+trusted fast path (model_construct + pydantic-core rendering):
+
+    python -m benchmarks.serialization --sizes 1 10000
+"""
+
+import argparse
+import time
+from typing import Any, Callable
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.responses import UserJSONResponse
+from app.models.users import User
+from app.services import users as user_service
+
+
+def documents(count: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "_id": ObjectId(),
+            "name": "Bench",
+            "surname": "User",
+            "username": f"bench_{i}",
+            "email": f"bench_{i}@example.com",
+            "age": 18 + i % 80,
+            "is_admin": False,
+            "disabled": False,
+        }
+        for i in range(count)
+    ]
+
+
+def strict(docs: list[dict[str, Any]]) -> bytes:
+    """Pre-change path: validate on read, then FastAPI validates and encodes"""
+    settings.STRICT_SERIALIZATION = True
+    users = [user_service.serialize_user(doc) for doc in docs]
+    validated = [User.model_validate(user.model_dump()) for user in users]
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def fast(docs: list[dict[str, Any]]) -> bytes:
+    settings.STRICT_SERIALIZATION = False
+    users = [user_service.serialize_user(doc) for doc in docs]
+    return UserJSONResponse(users).body
+
+
+def measure(fn: Callable[[list[dict[str, Any]]], bytes], size: int) -> float:
+    """Best-of-5 microseconds per document"""
+    best = float("inf")
+    for _ in range(5):
+        docs = documents(size)
+        start = time.perf_counter()
+        fn(docs)
+        best = min(best, time.perf_counter() - start)
+    return best / size * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10_000])
+    args = parser.parse_args()
+
+    print(f"{'docs':>8} {'strict us/doc':>14} {'fast us/doc':>12} {'speedup':>8}")
+    for size in args.sizes:
+        before, after = measure(strict, size), measure(fast, size)
+        print(f"{size:>8} {before:>14.2f} {after:>12.2f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
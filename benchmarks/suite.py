@@ -0,0 +1,274 @@
+"""
+Microbenchmarks for the service and security layers.
+
+`run` times each function against the in-process Mongo stand-in (or the
+mongod in MONGODB_URL with --mongo; point MONGODB_DB_NAME at a throwaway
+database) and saves the results as JSON. `compare` diffs two result files
+and exits non-zero when any benchmark regressed beyond --threshold:
+
+    python -m benchmarks.suite run --output benchmarks/results/base.json
+    python -m benchmarks.suite run --output benchmarks/results/new.json
+    python -m benchmarks.suite compare benchmarks/results/base.json \\
+        benchmarks/results/new.json --threshold 10
+"""
+
+import argparse
+import asyncio
+import datetime
+import inspect
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from bson import ObjectId
+
+from app.core import security
+from app.core.hashing import get_password_hash
+from app.database.client import get_users_collection
+from app.database.indexes import ensure_indexes
+from app.models.token import TokenData
+from app.models.users import UserDBCreate
+from app.schemas.auth_form import RefreshForm
+from app.services import auth, refresh_tokens, users
+from benchmarks.inmemory import use_inmemory_database
+
+PASSWORD = "BenchPassword123"
+DEFAULT_OUTPUT = Path(__file__).parent / "results" / "latest.json"
+
+
+class Context:
+    """Shared fixtures: seeded users and a token for the first of them"""
+
+    def __init__(self, seeded: list[dict[str, Any]]) -> None:
+        self.seeded = seeded
+        self.email = seeded[0]["email"]
+        self.token = security.create_access_token({"sub": self.email})
+        self.token_data = TokenData(email=self.email)
+        self.run_id = uuid.uuid4().hex[:8]
+        self.counter = 0
+        self.refresh_token: str | None = None
+
+    def new_user(self) -> UserDBCreate:
+        self.counter += 1
+        suffix = f"{self.run_id}{self.counter}"
+        return UserDBCreate(
+            name="Bench",
+            surname="Created",
+            username=f"c{suffix}"[:20],
+            email=f"created_{suffix}@example.com",
+            age=30,
+            password=PASSWORD,
+        )
+
+
+def synthetic_user(i: int, run_id: str, password_hash: str) -> dict[str, Any]:
+    return {
+        "name": "Bench",
+        "surname": "User",
+        "username": f"s{run_id}_{i}",
+        "email": f"suite_{run_id}_{i}@example.com",
+        "age": 18 + i % 80,
+        "is_admin": i == 0,
+        "disabled": False,
+        "password": password_hash,
+    }
+
+
+async def seed(count: int) -> list[dict[str, Any]]:
+    password_hash = get_password_hash(PASSWORD)
+    run_id = uuid.uuid4().hex[:6]
+    documents = [synthetic_user(i, run_id, password_hash) for i in range(count)]
+    await get_users_collection().insert_many(documents, ordered=False)
+    return documents
+
+
+def uncached_current_user(ctx: Context) -> Awaitable[TokenData]:
+    security.token_cache.clear()
+    return security.get_current_user(ctx.token)
+
+
+def uncached_active_user(ctx: Context) -> Awaitable[Any]:
+    users.user_cache.clear()
+    return security.get_current_active_user(ctx.token_data)
+
+
+async def email_lookup_burst(ctx: Context) -> None:
+    """Twenty concurrent uncached lookups: one client fanning out with a token"""
+    await asyncio.gather(
+        *(users.get_user_by_email(doc["email"]) for doc in ctx.seeded[:4] * 5)
+    )
+
+
+async def refresh_session(ctx: Context) -> None:
+    """One rotation of a refresh-token session, the bcrypt-free login path"""
+    if ctx.refresh_token is None:
+        user = await users.get_user_by_email(ctx.email)
+        assert user is not None
+        ctx.refresh_token = await refresh_tokens.issue_refresh_token(user)
+    token = await auth.refresh_access_token(
+        RefreshForm(refresh_token=ctx.refresh_token)
+    )
+    ctx.refresh_token = token.refresh_token
+
+
+BENCHMARKS: dict[str, Callable[[Context], Any]] = {
+    "serialize_user": lambda ctx: users.serialize_user(
+        dict(ctx.seeded[1], _id=ObjectId())
+    ),
+    "get_users": lambda ctx: users.get_users(limit=50),
+    "get_users_fields": lambda ctx: users.get_users(
+        limit=50, fields=("username", "id")
+    ),
+    "get_users_by_ids": lambda ctx: users.get_users_by_ids(
+        [doc["_id"] for doc in ctx.seeded[:50]]
+    ),
+    "get_user_by_email": lambda ctx: users.get_user_by_email(ctx.email),
+    "get_user_by_email_burst": email_lookup_burst,
+    "create_user": lambda ctx: users.create_user(ctx.new_user()),
+    "authenticate_user": lambda ctx: auth.authenticate_user(ctx.email, PASSWORD),
+    "refresh_session": refresh_session,
+    "create_access_token": lambda ctx: security.create_access_token({"sub": ctx.email}),
+    "get_current_user": lambda ctx: security.get_current_user(ctx.token),
+    "get_current_user_uncached": uncached_current_user,
+    "get_current_active_user": lambda ctx: security.get_current_active_user(
+        ctx.token_data
+    ),
+    "get_current_active_user_uncached": uncached_active_user,
+}
+
+
+async def time_benchmark(
+    fn: Callable[[Context], Any], ctx: Context, min_time: float, min_runs: int
+) -> dict[str, float]:
+    """Call fn until min_time has elapsed and summarize per-call latency"""
+
+    async def once() -> None:
+        result = fn(ctx)
+        if inspect.isawaitable(result):
+            await result
+
+    await once()  # warm-up
+    samples: list[float] = []
+    started = time.perf_counter()
+    while len(samples) < min_runs or time.perf_counter() - started < min_time:
+        start = time.perf_counter_ns()
+        await once()
+        samples.append((time.perf_counter_ns() - start) / 1000)
+
+    samples.sort()
+    return {
+        "iterations": len(samples),
+        "mean_us": statistics.fmean(samples),
+        "median_us": statistics.median(samples),
+        "p95_us": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "stdev_us": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> None:
+    if not args.mongo:
+        use_inmemory_database()
+    await ensure_indexes()
+    ctx = Context(await seed(args.users))
+
+    selected = args.only or list(BENCHMARKS)
+    results = {}
+    print(f"{'benchmark':<34} {'median us':>11} {'p95 us':>11} {'runs':>7}")
+    for name in selected:
+        result = await time_benchmark(
+            BENCHMARKS[name], ctx, args.min_time, args.min_runs
+        )
+        results[name] = result
+        print(
+            f"{name:<34} {result['median_us']:>11.1f} "
+            f"{result['p95_us']:>11.1f} {result['iterations']:>7}"
+        )
+
+    output = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": "mongod" if args.mongo else "inmemory",
+            "users": args.users,
+        },
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(output, indent=2))
+    print(f"saved {args.output}")
+
+
+def compare(args: argparse.Namespace) -> None:
+    baseline = json.loads(args.baseline.read_text())["results"]
+    current = json.loads(args.current.read_text())["results"]
+
+    regressions = []
+    print(f"{'benchmark':<34} {'base':>11} {'current':>11} {'change':>9}")
+    for name in sorted(baseline.keys() & current.keys()):
+        before = baseline[name][args.metric]
+        after = current[name][args.metric]
+        change = (after - before) / before * 100 if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<34} {before:>11.1f} {after:>11.1f} {change:>+8.1f}%{flag}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold}%")
+        sys.exit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run benchmarks and save JSON")
+    run_parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    run_parser.add_argument("--users", type=int, default=1000)
+    run_parser.add_argument("--min-time", type=float, default=1.0)
+    run_parser.add_argument("--min-runs", type=int, default=5)
+    run_parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS))
+    run_parser.add_argument(
+        "--mongo", action="store_true", help="use MONGODB_URL instead of in-memory"
+    )
+
+    compare_parser = commands.add_parser("compare", help="flag regressions")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=10.0)
+    compare_parser.add_argument(
+        "--metric", default="median_us", choices=["median_us", "mean_us", "p95_us"]
+    )
+
+    args = parser.parse_args()
+    if args.command == "run":
+        asyncio.run(run(args))
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Throughput of the server mode (app.server) at different worker counts.
+
+For each count, starts `python -m app.server --workers N` on a free port
+and drives it over HTTP keep-alive from this process:
+
+    python -m benchmarks.workers --workers 1,2,4 --concurrency 64 --duration 15
+
+Each worker has its own in-memory Mongo stand-in (see seeded_app), so the
+load is the read-mostly part of the loadgen mix over users seeded the same
+way in every worker: fixed ids, and tokens signed with the shared
+SECRET_KEY that any worker accepts. Writes would land in one worker only.
+The client shares the machine, so leave CPUs free for it.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Any
+from urllib.parse import urlencode
+
+from bson import ObjectId
+
+from benchmarks.loadgen import HTTPTransport, Stats, parse_mix
+
+USERS = 100
+PASSWORD = "A1234567891011"
+DEFAULT_MIX = "me=50,get_user=25,get_users=10,root=10,login=5"
+
+
+def user_id(n: int) -> ObjectId:
+    return ObjectId(f"{n:024x}")
+
+
+def email(n: int) -> str:
+    return f"bench{n}@example.com"
+
+
+def seeded_app() -> Any:
+    """app.main:app on a stand-in database holding the benchmark users"""
+    from benchmarks.inmemory import use_inmemory_database
+
+    database = use_inmemory_database(
+        latency=float(os.environ.get("BENCH_LATENCY_MS", "1")) / 1000
+    )
+    from app.core.hashing import get_password_hash
+    from app.main import app
+
+    password = get_password_hash(PASSWORD)
+    users = [
+        {
+            "_id": user_id(n),
+            "name": "bench",
+            "surname": "user",
+            "username": f"bench{n}",
+            "email": email(n),
+            "age": 30,
+            "is_admin": True,
+            "disabled": False,
+            "password": password,
+            "version": 1,
+        }
+        for n in range(USERS)
+    ]
+    seeded = False
+
+    async def seeding_app(scope: Any, receive: Any, send: Any) -> None:
+        nonlocal seeded
+        if not seeded:
+            seeded = True
+            await database.get_collection("users").insert_many(users)
+        await app(scope, receive, send)
+
+    return seeding_app
+
+
+def __getattr__(name: str) -> Any:
+    # benchmarks.workers:app is built on first access, so only the server
+    # workers importing it set up the stand-in, never the driver
+    if name == "app":
+        globals()["app"] = seeded_app()
+        return globals()["app"]
+    raise AttributeError(name)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int, latency_ms: float) -> subprocess.Popen:
+    env = os.environ | {
+        "BENCH_LATENCY_MS": str(latency_ms),
+        "MONGODB_URL": os.environ.get("MONGODB_URL") or "mongodb://unused",
+        "ENSURE_INDEXES_ON_STARTUP": "false",
+        "LOG_LEVEL": "WARNING",
+    }
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "app.server",
+            "--app",
+            "benchmarks.workers:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+        ],
+        env=env,
+    )
+
+
+async def wait_ready(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        transport = HTTPTransport(url)
+        try:
+            if (await transport.request("GET", "/")).status == 200:
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+        finally:
+            await transport.close()
+
+
+async def drive(
+    url: str, concurrency: int, duration: float, mix: str
+) -> dict[str, Any]:
+    from app.core.security import create_access_token
+
+    flows, weights = parse_mix(mix)
+    transport = HTTPTransport(url)
+    stats = Stats()
+    deadline = time.perf_counter() + duration
+
+    async def client(n: int) -> None:
+        user = n % USERS
+        auth = {"authorization": f"Bearer {create_access_token({'sub': email(user)})}"}
+        login = urlencode({"email": email(user), "password": PASSWORD}).encode()
+        requests = {
+            "root": ("GET /", "GET", "/", {}, b""),
+            "me": ("GET /users/me", "GET", "/users/me", auth, b""),
+            "get_user": (
+                "GET /users/{user_id}",
+                "GET",
+                f"/users/{user_id(user)}",
+                auth,
+                b"",
+            ),
+            "get_users": ("GET /users/", "GET", "/users/", auth, b""),
+            "login": (
+                "POST /users/login",
+                "POST",
+                "/users/login",
+                {"content-type": "application/x-www-form-urlencoded"},
+                login,
+            ),
+        }
+        while time.perf_counter() < deadline:
+            route, method, path, headers, body = requests[
+                random.choices(flows, weights)[0]
+            ]
+            start = time.perf_counter()
+            response = await transport.request(method, path, headers, body)
+            stats.record(route, response.status, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(client(n) for n in range(concurrency)))
+    finally:
+        await transport.close()
+    return stats.report(time.perf_counter() - start)
+
+
+def errors(report: dict[str, Any]) -> int:
+    return sum(
+        count
+        for route in report["routes"].values()
+        for status, count in route["statuses"].items()
+        if status >= 400
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    parser.add_argument("--json", help="also write the reports to this file")
+    args = parser.parse_args()
+
+    print(f"cpus={os.cpu_count()} concurrency={args.concurrency} mix={args.mix}")
+    header = f"{'workers':>7} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    print(header + f" {'errors':>7}")
+    reports = {}
+    for workers in [int(n) for n in args.workers.split(",")]:
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = start_server(workers, port, args.latency_ms)
+        try:
+            await wait_ready(url)
+            await drive(url, args.concurrency, args.warmup, args.mix)
+            report = await drive(url, args.concurrency, args.duration, args.mix)
+        finally:
+            server.terminate()
+            server.wait()
+        reports[workers] = report
+        total = report["total"]
+        print(
+            f"{workers:>7} {total['rps']:>9.1f} {total['p50_ms']:>8.2f} "
+            f"{total['p95_ms']:>8.2f} {total['p99_ms']:>8.2f} {errors(report):>7}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
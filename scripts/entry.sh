@@ -1,4 +1,9 @@
 #!/bin/sh
+# `serve` runs the long-running HTTP server instead of the Lambda runtime
+if [ "$1" = "serve" ]; then
+    shift
+    exec python -m app.server "$@"
+fi
 if [ -z "${AWS_LAMBDA_RUNTIME_API}" ]; then
     exec /usr/bin/aws-lambda-rie python -m awslambdaric $@
 else
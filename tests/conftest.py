@@ -0,0 +1,111 @@
+"""
+Request-level tests against the in-memory Mongo stand-in from benchmarks/.
+
+Every test gets an empty database with the app's indexes, fresh caches and
+revocation state, and a TestClient that runs the app's lifespan.
+"""
+
+import asyncio
+import os
+from typing import Any, Callable
+
+# Settings are read at import time, so these go in before the app is imported
+os.environ.setdefault("SECRET_KEY", "test-secret-key-" + "x" * 32)
+os.environ.setdefault("MONGODB_URL", "mongodb://unused")
+os.environ.update(
+    BCRYPT_ROUNDS="4",
+    BCRYPT_MIN_ROUNDS="4",
+    ENSURE_INDEXES_ON_STARTUP="false",
+    LOG_QUEUE="false",
+    METRICS_EMF="false",
+)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.security import token_cache  # noqa: E402
+from app.database.indexes import ensure_indexes  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services import revocations  # noqa: E402
+from app.services.users import user_cache  # noqa: E402
+from benchmarks.inmemory import InMemoryDatabase, use_inmemory_database  # noqa: E402
+
+PASSWORD = "A1234567891011"
+
+
+def new_revocation_list() -> revocations.RevocationList:
+    return revocations.RevocationList(
+        sync_interval=settings.REVOCATION_SYNC_INTERVAL_SECONDS,
+        capacity=settings.REVOCATION_FILTER_CAPACITY,
+        error_rate=settings.REVOCATION_FILTER_ERROR_RATE,
+    )
+
+
+@pytest.fixture
+def database(monkeypatch: pytest.MonkeyPatch) -> InMemoryDatabase:
+    database = use_inmemory_database()
+    asyncio.run(ensure_indexes())
+    user_cache.clear()
+    token_cache.clear()
+    monkeypatch.setattr(revocations, "revocation_list", new_revocation_list())
+    return database
+
+
+@pytest.fixture
+def client(database: InMemoryDatabase):
+    with TestClient(app) as client:
+        yield client
+
+
+def auth(token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def register(client: TestClient) -> Callable[..., dict[str, Any]]:
+    """Register a user; returns the created user"""
+
+    def register(username: str, **fields: Any) -> dict[str, Any]:
+        body = {
+            "name": "Test",
+            "surname": "User",
+            "username": username,
+            "email": f"{username}@example.com",
+            "age": 30,
+            "password": PASSWORD,
+        } | fields
+        response = client.post("/users/register", json=body)
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    return register
+
+
+@pytest.fixture
+def login(client: TestClient) -> Callable[[str], dict[str, Any]]:
+    """Log a user in by email; returns the token response"""
+
+    def login(email: str, password: str = PASSWORD) -> dict[str, Any]:
+        response = client.post(
+            "/users/login", data={"email": email, "password": password}
+        )
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return login
+
+
+@pytest.fixture
+def user_session(
+    register: Callable[..., dict[str, Any]], login: Callable[[str], dict[str, Any]]
+) -> Callable[..., tuple[dict[str, Any], dict[str, str]]]:
+    """Register and log in a user; returns the user and its auth headers"""
+
+    def user_session(
+        username: str, **fields: Any
+    ) -> tuple[dict[str, Any], dict[str, str]]:
+        user = register(username, **fields)
+        return user, auth(login(user["email"])["access_token"])
+
+    return user_session
@@ -0,0 +1,157 @@
+import asyncio
+import time
+
+import pytest
+from pymongo.errors import AutoReconnect, NetworkTimeout
+
+from app.core.config import settings
+from app.database.client import get_revoked_tokens_collection
+from app.models.token import TokenData
+from app.services import revocations
+from tests.conftest import PASSWORD, auth, new_revocation_list
+
+
+def test_login_rejects_wrong_password(client, register):
+    user = register("alice")
+    response = client.post(
+        "/users/login", data={"email": user["email"], "password": PASSWORD + "x"}
+    )
+    assert response.status_code == 401
+
+
+def test_access_token_reads_own_profile(client, user_session):
+    user, headers = user_session("alice")
+    response = client.get("/users/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["id"] == user["id"]
+    assert "password" not in response.json()
+
+
+def test_invalid_token_is_rejected(client):
+    assert client.get("/users/me", headers=auth("not-a-jwt")).status_code == 401
+
+
+def test_refresh_rotates_the_refresh_token(client, register, login):
+    tokens = login(register("alice")["email"])
+    response = client.post(
+        "/users/refresh", data={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert client.get("/users/me", headers=auth(rotated["access_token"])).is_success
+
+
+def test_refresh_token_reuse_revokes_the_family(client, register, login):
+    tokens = login(register("alice")["email"])
+    rotated = client.post(
+        "/users/refresh", data={"refresh_token": tokens["refresh_token"]}
+    ).json()
+
+    reused = client.post(
+        "/users/refresh", data={"refresh_token": tokens["refresh_token"]}
+    )
+    assert reused.status_code == 401
+    # The legitimate holder's newer token dies with the family
+    response = client.post(
+        "/users/refresh", data={"refresh_token": rotated["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+
+def test_logout_revokes_access_and_refresh_tokens(client, register, login):
+    tokens = login(register("alice")["email"])
+    headers = auth(tokens["access_token"])
+    assert client.get("/users/me", headers=headers).status_code == 200
+
+    response = client.post(
+        "/users/logout",
+        headers=headers,
+        data={"refresh_token": tokens["refresh_token"]},
+    )
+    assert response.status_code == 204
+    assert client.get("/users/me", headers=headers).status_code == 401
+    response = client.post(
+        "/users/refresh", data={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+
+def test_logout_leaves_other_sessions(client, register, login):
+    email = register("alice")["email"]
+    first, second = login(email), login(email)
+    client.post("/users/logout", headers=auth(first["access_token"]))
+    assert client.get("/users/me", headers=auth(second["access_token"])).is_success
+
+
+def test_admin_revokes_all_sessions_of_a_user(client, user_session, login):
+    _, admin = user_session("admin", is_admin=True)
+    bob, bob_headers = user_session("bob")
+    bob_tokens = login(bob["email"])
+
+    response = client.post(f"/users/{bob['id']}/revoke", headers=admin)
+    assert response.status_code == 204
+    assert client.get("/users/me", headers=bob_headers).status_code == 401
+    response = client.post(
+        "/users/refresh", data={"refresh_token": bob_tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+    assert client.get("/users/me", headers=admin).status_code == 200
+
+
+def test_non_admin_cannot_revoke_sessions(client, user_session):
+    alice, _ = user_session("alice")
+    _, bob = user_session("bob")
+    response = client.post(f"/users/{alice['id']}/revoke", headers=bob)
+    assert response.status_code == 403
+
+
+def test_confirmed_revocations_are_remembered_without_token_cache(
+    database, monkeypatch
+):
+    # A disabled token cache must not turn every filter hit into a Mongo read
+    monkeypatch.setattr(settings, "TOKEN_CACHE_MAX_SIZE", 0)
+    revocation_list = new_revocation_list()
+    monkeypatch.setattr(revocations, "revocation_list", revocation_list)
+
+    async def check() -> None:
+        await revocations.revoke_user_tokens("alice@example.com")
+        later = TokenData(email="alice@example.com", iat=int(time.time()) + 60)
+        for _ in range(3):
+            assert not await revocations.is_token_revoked(later)
+
+    asyncio.run(check())
+    assert revocation_list.filter_hits == 3
+    assert revocation_list.confirmations == 0
+
+
+@pytest.mark.parametrize("size", [0, -1])
+def test_revocation_memo_cannot_be_disabled(size):
+    with pytest.raises(ValueError):
+        type(settings)(REVOCATION_CONFIRMED_MAX_SIZE=size)
+
+
+@pytest.mark.parametrize(
+    "error, status_code",
+    [(NetworkTimeout("timed out"), 504), (AutoReconnect("connection reset"), 500)],
+)
+def test_confirmation_error_is_a_database_error(
+    client, user_session, monkeypatch, error, status_code
+):
+    user, headers = user_session("alice")
+    _, admin = user_session("admin", is_admin=True)
+    client.post(f"/users/{user['id']}/revoke", headers=admin)
+    # A fresh process: the filter knows the revocation, its memo doesn't
+    monkeypatch.setattr(revocations, "revocation_list", new_revocation_list())
+
+    collection = get_revoked_tokens_collection()
+    find = collection.find
+
+    def failing_find(filter, *args, **kwargs):
+        if "_id" in filter:
+            raise error
+        return find(filter, *args, **kwargs)
+
+    monkeypatch.setattr(collection, "find", failing_find)
+    response = client.get("/users/me", headers=headers)
+    assert response.status_code == status_code
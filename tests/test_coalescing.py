@@ -0,0 +1,79 @@
+import asyncio
+import time
+from typing import Any, Awaitable
+
+import pymongo
+import pytest
+from pymongo import _csot
+
+from app.core.coalescing import BatchLoader, SingleFlight
+from app.core.deadlines import (
+    current_deadline,
+    remaining_seconds,
+    shared_deadline_seconds,
+)
+from app.core.metrics import RequestMetrics, current_request
+
+hurried_request = RequestMetrics({"type": "http"})
+
+
+async def with_deadline[T](seconds: float, call: Awaitable[T]) -> T:
+    """Await call the way a request with a budget of seconds would"""
+    current_request.set(hurried_request)
+    current_deadline.set(time.monotonic() + seconds)
+    with pymongo.timeout(seconds):
+        return await call
+
+
+def shared_task_context() -> tuple[RequestMetrics | None, float | None, bool]:
+    """What the shared task sees: request, Mongo timeout, whether deadline"""
+    remaining = remaining_seconds()
+    return current_request.get(), _csot.get_timeout(), remaining is not None
+
+
+def check_shared_context(seen: list[Any]) -> None:
+    # The starting request's metrics, but the shared deadline, not its own
+    assert seen == [(hurried_request, shared_deadline_seconds(), True)]
+
+
+def test_batch_is_not_bound_by_the_first_callers_deadline():
+    seen = []
+
+    async def load(keys: list[str]) -> dict[str, str]:
+        seen.append(shared_task_context())
+        await asyncio.sleep(0.05)
+        return {key: key.upper() for key in keys}
+
+    async def check() -> None:
+        loader = BatchLoader(load, window=0, max_size=10)
+        hurried = asyncio.create_task(with_deadline(0.01, loader.load("a")))
+        patient = asyncio.create_task(loader.load("b"))
+        with pytest.raises(TimeoutError):
+            await hurried
+        assert await patient == "B"
+        assert loader.batches == 1
+
+    asyncio.run(check())
+    check_shared_context(seen)
+
+
+def test_single_flight_is_not_bound_by_the_first_callers_deadline():
+    seen = []
+
+    async def fetch() -> str:
+        seen.append(shared_task_context())
+        await asyncio.sleep(0.05)
+        return "user"
+
+    async def check() -> None:
+        flight: SingleFlight[str, str] = SingleFlight()
+        hurried = asyncio.create_task(with_deadline(0.01, flight.do("a", fetch)))
+        await asyncio.sleep(0)
+        patient = asyncio.create_task(flight.do("a", fetch))
+        with pytest.raises(TimeoutError):
+            await hurried
+        assert await patient == "user"
+        assert flight.shared == 1
+
+    asyncio.run(check())
+    check_shared_context(seen)
@@ -0,0 +1,85 @@
+def test_read_returns_etag_and_honours_if_none_match(client, user_session):
+    user, headers = user_session("alice")
+    response = client.get("/users/me", headers=headers)
+    etag = response.headers["ETag"]
+    assert etag == f'"{user["id"]}-1"'
+
+    response = client.get("/users/me", headers=headers | {"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert not response.content
+
+
+def test_weak_tag_matches_if_none_match(client, user_session):
+    user, headers = user_session("alice")
+    response = client.get(
+        f"/users/{user['id']}",
+        headers=headers | {"If-None-Match": f'W/"{user["id"]}-1"'},
+    )
+    assert response.status_code == 304
+
+
+def test_admin_gets_304_for_another_user(client, user_session):
+    bob, _ = user_session("bob")
+    _, admin = user_session("admin", is_admin=True)
+    etag = client.get(f"/users/{bob['id']}", headers=admin).headers["ETag"]
+    response = client.get(
+        f"/users/{bob['id']}", headers=admin | {"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+
+def test_update_bumps_version_and_etag(client, user_session):
+    user, headers = user_session("alice")
+    etag = client.get("/users/me", headers=headers).headers["ETag"]
+
+    response = client.put(
+        f"/users/{user['id']}", headers=headers | {"If-Match": etag}, json={"age": 40}
+    )
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert response.headers["ETag"] == f'"{user["id"]}-2"'
+
+    response = client.get("/users/me", headers=headers | {"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["age"] == 40
+
+
+def test_stale_if_match_is_412(client, user_session):
+    user, headers = user_session("alice")
+    etag = client.get("/users/me", headers=headers).headers["ETag"]
+    client.put(f"/users/{user['id']}", headers=headers, json={"age": 40})
+
+    response = client.put(
+        f"/users/{user['id']}", headers=headers | {"If-Match": etag}, json={"age": 50}
+    )
+    assert response.status_code == 412
+    assert response.headers["X-Error"] == "VERSION_MISMATCH"
+    assert client.get("/users/me", headers=headers).json()["age"] == 40
+
+
+def test_weak_or_foreign_tag_fails_if_match(client, user_session):
+    user, headers = user_session("alice")
+    bob, _ = user_session("bob")
+    for tag in (f'W/"{user["id"]}-1"', f'"{bob["id"]}-1"'):
+        response = client.put(
+            f"/users/{user['id']}",
+            headers=headers | {"If-Match": tag},
+            json={"age": 41},
+        )
+        assert response.status_code == 412
+
+
+def test_fieldset_etag_satisfies_if_match(client, user_session):
+    user, headers = user_session("alice")
+    response = client.get("/users/me?fields=id,age", headers=headers)
+    etag = response.headers["ETag"]
+    # Fields are listed in model order, whatever order the query used
+    assert etag == f'"{user["id"]}-1+age+id"'
+    # A full read is a different representation of the same version
+    assert etag != client.get("/users/me", headers=headers).headers["ETag"]
+
+    response = client.put(
+        f"/users/{user['id']}", headers=headers | {"If-Match": etag}, json={"age": 41}
+    )
+    assert response.status_code == 200
@@ -0,0 +1,83 @@
+from app.core.config import settings
+
+
+def test_own_profile_fieldset(client, user_session):
+    user, headers = user_session("alice")
+    response = client.get("/users/me?fields=username,id", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"id": user["id"], "username": "alice"}
+
+
+def test_unknown_field_is_400(client, user_session):
+    _, headers = user_session("alice")
+    response = client.get("/users/me?fields=id,password", headers=headers)
+    assert response.status_code == 400
+    assert response.headers["X-Error"] == "INVALID_FIELDS"
+
+
+def test_admin_reads_another_user_fieldset(client, user_session):
+    bob, _ = user_session("bob")
+    _, admin = user_session("admin", is_admin=True)
+    response = client.get(f"/users/{bob['id']}?fields=id,email", headers=admin)
+    assert response.status_code == 200
+    assert response.json() == {"id": bob["id"], "email": bob["email"]}
+
+
+def test_non_admin_cannot_read_another_user(client, user_session):
+    bob, _ = user_session("bob")
+    _, headers = user_session("alice")
+    response = client.get(f"/users/{bob['id']}?fields=id", headers=headers)
+    assert response.status_code == 403
+
+
+def test_list_fieldset(client, user_session):
+    user_session("bob")
+    _, admin = user_session("admin", is_admin=True)
+    response = client.get("/users/?fields=username,age", headers=admin)
+    assert response.status_code == 200
+    assert response.json()["users"] == [
+        {"username": "bob", "age": 30},
+        {"username": "admin", "age": 30},
+    ]
+
+
+def test_ids_fieldset_keeps_request_order(client, user_session):
+    bob, _ = user_session("bob")
+    carol, _ = user_session("carol")
+    _, admin = user_session("admin", is_admin=True)
+    response = client.get(
+        "/users/",
+        params={"ids": f"{carol['id']},{bob['id']}", "fields": "id"},
+        headers=admin,
+    )
+    assert response.status_code == 200
+    assert response.json()["users"] == [{"id": carol["id"]}, {"id": bob["id"]}]
+
+
+def test_admin_reads_another_user_fieldset_without_email(client, user_session):
+    bob, _ = user_session("bob")
+    _, admin = user_session("admin", is_admin=True)
+    response = client.get(f"/users/{bob['id']}?fields=id,username", headers=admin)
+    assert response.status_code == 200
+    assert response.json() == {"id": bob["id"], "username": "bob"}
+
+
+def test_strict_serialization_validates_only_the_fieldset(
+    client, user_session, monkeypatch
+):
+    bob, _ = user_session("bob")
+    _, admin = user_session("admin", is_admin=True)
+    monkeypatch.setattr(settings, "STRICT_SERIALIZATION", True)
+
+    response = client.get("/users/?fields=id,username", headers=admin)
+    assert response.status_code == 200
+    assert {"id": bob["id"], "username": "bob"} in response.json()["users"]
+
+    response = client.get(
+        "/users/", params={"ids": bob["id"], "fields": "age"}, headers=admin
+    )
+    assert response.json()["users"] == [{"age": 30}]
+
+    response = client.get(f"/users/{bob['id']}?fields=username", headers=admin)
+    assert response.status_code == 200
+    assert response.json() == {"username": "bob"}
@@ -0,0 +1,147 @@
+import pytest
+from fastapi import HTTPException
+
+from app.models.user_filter import UserFilter
+from app.services.users import user_filter_query
+
+BOTH_FLAGS = {"$in": [False, True]}
+
+
+@pytest.mark.parametrize(
+    "filters, plan",
+    [
+        (UserFilter(), ({}, None, "_id")),
+        (
+            UserFilter(disabled=False),
+            ({"is_admin": BOTH_FLAGS, "disabled": False}, "status_id_age", "_id"),
+        ),
+        (
+            UserFilter(is_admin=True, disabled=False, min_age=30),
+            (
+                {"is_admin": True, "disabled": False, "age": {"$gte": 30}},
+                "status_id_age",
+                "_id",
+            ),
+        ),
+        (
+            UserFilter(username_prefix="ali", max_age=40, is_admin=False),
+            (
+                {
+                    "username": {"$regex": "^ali"},
+                    "age": {"$lte": 40},
+                    "is_admin": False,
+                },
+                "username_unique",
+                "username",
+            ),
+        ),
+        (
+            UserFilter(email_prefix="a.b", username_prefix="ali"),
+            (
+                {"username": {"$regex": "^ali"}, "email": {"$regex": r"^a\.b"}},
+                "username_unique",
+                "username",
+            ),
+        ),
+        (
+            UserFilter(email_prefix="ali"),
+            ({"email": {"$regex": "^ali"}}, "email_unique", "email"),
+        ),
+    ],
+)
+def test_filter_plans(filters, plan):
+    assert user_filter_query(filters) == plan
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        UserFilter(min_age=30),
+        UserFilter(max_age=30, disabled=False),
+        UserFilter(min_age=20, max_age=30, is_admin=True),
+        UserFilter(username_prefix="al"),
+    ],
+)
+def test_filters_that_would_scan_are_rejected(filters):
+    with pytest.raises(HTTPException) as raised:
+        user_filter_query(filters)
+    assert raised.value.status_code == 400
+    assert raised.value.headers["X-Error"] == "FILTER_NEEDS_SCAN"
+
+
+def usernames(response):
+    return [user["username"] for user in response.json()["users"]]
+
+
+@pytest.fixture
+def admin(user_session):
+    _, headers = user_session("admin", is_admin=True)
+    for username, age in (("zed", 25), ("bob", 35), ("bobby", 45), ("bobo", 55)):
+        user_session(username, age=age)
+    return headers
+
+
+def test_flag_filters(client, admin):
+    response = client.get("/users/", params={"is_admin": False}, headers=admin)
+    assert usernames(response) == ["zed", "bob", "bobby", "bobo"]
+    response = client.get("/users/", params={"is_admin": True}, headers=admin)
+    assert usernames(response) == ["admin"]
+
+
+def test_age_filter_with_both_flags(client, admin):
+    params = {"is_admin": False, "disabled": False, "min_age": 30, "max_age": 50}
+    response = client.get("/users/", params=params, headers=admin)
+    assert usernames(response) == ["bob", "bobby"]
+
+
+def test_age_filter_alone_is_400(client, admin):
+    response = client.get("/users/", params={"min_age": 30}, headers=admin)
+    assert response.status_code == 400
+    assert response.headers["X-Error"] == "FILTER_NEEDS_SCAN"
+
+
+def test_prefix_pages_come_in_prefix_order(client, admin):
+    params = {"username_prefix": "bob", "limit": 2, "fields": "id"}
+    page = client.get("/users/", params=params, headers=admin).json()
+    assert len(page["users"]) == 2
+    assert page["next_cursor"].startswith("username.")
+
+    params["after"] = page["next_cursor"]
+    page = client.get("/users/", params=params, headers=admin).json()
+    assert len(page["users"]) == 1
+    assert page["next_cursor"] is None
+
+    response = client.get(
+        "/users/", params={"username_prefix": "bob", "min_age": 40}, headers=admin
+    )
+    assert usernames(response) == ["bobby", "bobo"]
+
+
+def test_cursor_must_match_the_page_order(client, admin):
+    page = client.get("/users/", params={"limit": 1}, headers=admin).json()
+    params = {"username_prefix": "bob", "after": page["next_cursor"]}
+    response = client.get("/users/", params=params, headers=admin)
+    assert response.status_code == 400
+    assert response.headers["X-Error"] == "INVALID_CURSOR"
+
+
+@pytest.mark.parametrize(
+    "params, total",
+    [
+        ({}, 5),
+        ({"is_admin": False}, 4),
+        ({"username_prefix": "bob", "max_age": 50}, 2),
+    ],
+)
+def test_count(client, admin, params, total):
+    response = client.get("/users/", params=params | {"count": True}, headers=admin)
+    assert response.json()["total"] == total
+    response = client.get("/users/", params=params, headers=admin)
+    assert response.json()["total"] is None
+
+
+def test_inverted_age_range_is_400(client, admin):
+    params = {"username_prefix": "bob", "min_age": 50, "max_age": 40}
+    response = client.get("/users/", params=params, headers=admin)
+    assert response.status_code == 400
+    assert response.headers["X-Error"] == "INVALID_FILTER"
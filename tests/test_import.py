@@ -0,0 +1,132 @@
+import json
+
+from pymongo.errors import NetworkTimeout
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.database.client import get_users_collection
+from tests.conftest import PASSWORD
+
+
+def record(username: str, **fields):
+    return {
+        "name": "Test",
+        "surname": "User",
+        "username": username,
+        "email": f"{username}@example.com",
+        "age": 30,
+        "password": PASSWORD,
+    } | fields
+
+
+def statuses(report):
+    return [(result["index"], result["status"]) for result in report["results"]]
+
+
+def test_import_reports_each_record(client, user_session):
+    _, admin = user_session("admin", is_admin=True)
+    records = [
+        record("bob"),
+        record("carol", password="short"),
+        record("admin2", email="admin@example.com"),
+        record("dave"),
+        record("dave2", email="dave@example.com"),
+    ]
+    response = client.post("/users/import", json=records, headers=admin)
+    assert response.status_code == 200
+    report = response.json()
+    assert statuses(report) == [
+        (0, "created"),
+        (1, "invalid"),
+        (2, "duplicate"),
+        (3, "created"),
+        (4, "duplicate"),
+    ]
+    assert (report["created"], report["duplicate"], report["invalid"]) == (2, 2, 1)
+    assert report["results"][2]["error"] == "email already exists"
+
+    bob = report["results"][0]
+    response = client.get(f"/users/{bob['id']}", headers=admin)
+    assert response.json()["username"] == "bob"
+    assert client.post(
+        "/users/login", data={"email": "bob@example.com", "password": PASSWORD}
+    ).is_success
+
+
+def test_import_ndjson_in_batches(client, user_session, monkeypatch):
+    _, admin = user_session("admin", is_admin=True)
+    monkeypatch.setattr(settings, "BULK_IMPORT_BATCH_SIZE", 2)
+    lines = [json.dumps(record(name)) for name in ("bob", "carol", "dave")]
+    body = "\n".join([lines[0], "", lines[1], "{not json", lines[2]]) + "\n"
+
+    response = client.post(
+        "/users/import",
+        content=body,
+        headers=admin | {"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert statuses(response.json()) == [
+        (0, "created"),
+        (1, "created"),
+        (2, "invalid"),
+        (3, "created"),
+    ]
+
+
+def test_import_rejects_a_body_that_is_not_an_array(client, user_session):
+    _, admin = user_session("admin", is_admin=True)
+    response = client.post("/users/import", json=record("bob"), headers=admin)
+    assert response.status_code == 400
+
+
+def test_non_admin_cannot_import(client, user_session):
+    _, headers = user_session("alice")
+    response = client.post("/users/import", json=[record("bob")], headers=headers)
+    assert response.status_code == 403
+    usernames = [user["username"] for user in get_users_collection().documents]
+    assert "bob" not in usernames
+
+
+def test_non_admin_is_refused_before_the_body_is_read(
+    client, user_session, monkeypatch
+):
+    _, headers = user_session("alice")
+
+    async def body(request: Request) -> bytes:
+        raise AssertionError("the upload must not be read")
+
+    monkeypatch.setattr(Request, "body", body)
+    response = client.post("/users/import", json=[record("bob")], headers=headers)
+    assert response.status_code == 403
+
+
+def test_database_error_keeps_the_committed_results(client, user_session, monkeypatch):
+    _, admin = user_session("admin", is_admin=True)
+    monkeypatch.setattr(settings, "BULK_IMPORT_BATCH_SIZE", 2)
+    collection = get_users_collection()
+    insert_many = collection.insert_many
+    calls = 0
+
+    async def failing_insert_many(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise NetworkTimeout("connection lost mid-import")
+        return await insert_many(*args, **kwargs)
+
+    monkeypatch.setattr(collection, "insert_many", failing_insert_many)
+    records = [record(name) for name in ("bob", "carol", "dave", "erin", "frank")]
+    response = client.post("/users/import", json=records, headers=admin)
+
+    assert response.status_code == 200
+    report = response.json()
+    assert statuses(report) == [
+        (0, "created"),
+        (1, "created"),
+        (2, "failed"),
+        (3, "failed"),
+        (4, "failed"),
+    ]
+    assert (report["created"], report["failed"]) == (2, 3)
+    # Only the first batch was written; the one after the error wasn't tried
+    assert calls == 2
@@ -0,0 +1,35 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.routers import metrics
+
+
+def test_metrics_are_off_by_default(client):
+    assert not type(settings)().METRICS_ENABLED
+    assert client.get("/metrics").status_code == 404
+
+
+@pytest.fixture
+def metrics_client():
+    app = FastAPI()
+    app.include_router(metrics.router)
+    return TestClient(app)
+
+
+def test_metrics_token_is_required_when_set(metrics_client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-me")
+    assert metrics_client.get("/metrics").status_code == 401
+    response = metrics_client.get("/metrics", headers={"Authorization": "Bearer no"})
+    assert response.status_code == 401
+
+    response = metrics_client.get(
+        "/metrics", headers={"Authorization": "Bearer scrape-me"}
+    )
+    assert response.status_code == 200
+    assert "http_request_duration_seconds" in response.text
+
+
+def test_metrics_without_token(metrics_client):
+    assert metrics_client.get("/metrics").status_code == 200
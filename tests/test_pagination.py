@@ -0,0 +1,49 @@
+import pytest
+
+from app.core.config import settings
+
+
+def test_pages_cover_every_user_once_in_id_order(client, user_session):
+    _, admin = user_session("admin", is_admin=True)
+    created = [user_session(name)[0]["id"] for name in ("bob", "carol", "dave")]
+
+    seen, after = [], None
+    while True:
+        params = {"limit": 2} | ({"after": after} if after else {})
+        page = client.get("/users/", params=params, headers=admin).json()
+        assert len(page["users"]) <= 2
+        assert all("password" not in user for user in page["users"])
+        seen += [user["id"] for user in page["users"]]
+        if not (after := page["next_cursor"]):
+            break
+
+    assert seen == sorted(seen)
+    assert seen[1:] == created
+
+
+def test_last_full_page_has_no_cursor(client, user_session):
+    _, admin = user_session("admin", is_admin=True)
+    user_session("bob")
+    page = client.get("/users/", params={"limit": 2}, headers=admin).json()
+    assert len(page["users"]) == 2
+    assert page["next_cursor"] is None
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "AAAA", "%%%%"])
+def test_invalid_cursor_is_400(client, user_session, cursor):
+    _, admin = user_session("admin", is_admin=True)
+    response = client.get("/users/", params={"after": cursor}, headers=admin)
+    assert response.status_code == 400
+    assert response.headers["X-Error"] == "INVALID_CURSOR"
+
+
+def test_limit_is_bounded(client, user_session):
+    _, admin = user_session("admin", is_admin=True)
+    limit = settings.USERS_PAGE_MAX_LIMIT + 1
+    response = client.get("/users/", params={"limit": limit}, headers=admin)
+    assert response.status_code == 422
+
+
+def test_non_admin_cannot_list_users(client, user_session):
+    _, headers = user_session("alice")
+    assert client.get("/users/", headers=headers).status_code == 403
@@ -0,0 +1,134 @@
+import pytest
+from pymongo.errors import NetworkTimeout
+
+from app.database import indexes
+from app.services import users
+from benchmarks.inmemory import use_inmemory_database
+from tests.conftest import PASSWORD
+
+
+def test_duplicate_email_and_username_are_rejected(client, register):
+    register("alice")
+    for fields in ({"username": "alice2"}, {"email": "other@example.com"}):
+        body = {
+            "name": "Test",
+            "surname": "User",
+            "username": "alice",
+            "email": "alice@example.com",
+            "age": 30,
+            "password": PASSWORD,
+        } | fields
+        assert client.post("/users/register", json=body).status_code == 400
+
+
+def test_duplicates_rejected_while_indexes_unverified(client, register, monkeypatch):
+    # As when ENSURE_INDEXES_ON_STARTUP=false and no migration has run yet
+    use_inmemory_database()
+    monkeypatch.setattr(indexes, "_unique_user_indexes_verified", False)
+
+    register("alice")
+    body = {
+        "name": "Test",
+        "surname": "User",
+        "username": "alice",
+        "email": "other@example.com",
+        "age": 30,
+        "password": PASSWORD,
+    }
+    response = client.post("/users/register", json=body)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username already taken"
+
+
+def test_duplicate_is_rejected_before_hashing(client, register, monkeypatch):
+    use_inmemory_database()
+    monkeypatch.setattr(indexes, "_unique_user_indexes_verified", False)
+    register("alice")
+
+    async def hash_password(password: str) -> str:
+        raise AssertionError("a duplicate must not be hashed")
+
+    monkeypatch.setattr(users, "get_password_hash_async", hash_password)
+    body = {
+        "name": "Test",
+        "surname": "User",
+        "username": "other",
+        "email": "alice@example.com",
+        "age": 30,
+        "password": PASSWORD,
+    }
+    response = client.post("/users/register", json=body)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
+
+
+def test_non_admin_cannot_update_or_delete_another_user(client, user_session):
+    bob, _ = user_session("bob")
+    _, headers = user_session("alice")
+    response = client.put(f"/users/{bob['id']}", headers=headers, json={"age": 50})
+    assert response.status_code == 403
+    assert client.delete(f"/users/{bob['id']}", headers=headers).status_code == 403
+
+
+def test_non_admin_full_profile_put(client, user_session):
+    user, headers = user_session("alice")
+    profile = {key: user[key] for key in ("name", "surname", "username", "email")}
+    body = profile | {"age": 31, "is_admin": False, "disabled": False}
+    response = client.put(f"/users/{user['id']}", headers=headers, json=body)
+    assert response.status_code == 200
+    assert response.json()["age"] == 31
+
+
+@pytest.mark.parametrize("field", ["is_admin", "disabled"])
+def test_non_admin_cannot_change_privileges(client, user_session, field):
+    user, headers = user_session("alice")
+    response = client.put(f"/users/{user['id']}", headers=headers, json={field: True})
+    assert response.status_code == 403
+
+
+def test_delete_own_account(client, user_session):
+    user, headers = user_session("alice")
+    assert client.delete(f"/users/{user['id']}", headers=headers).status_code == 204
+    assert client.get("/users/me", headers=headers).status_code in (401, 404)
+
+
+def test_export_error_aborts_the_response(client, user_session, monkeypatch):
+    _, admin = user_session("admin", is_admin=True)
+    for name in ("bob", "carol", "dave"):
+        user_session(name)
+    monkeypatch.setattr(users.settings, "EXPORT_BATCH_SIZE", 1)
+
+    collection = users.get_users_collection()
+
+    class FailingCursor:
+        def __init__(self, cursor):
+            self.cursor = cursor
+
+        def sort(self, *args):
+            self.cursor.sort(*args)
+            return self
+
+        async def __aiter__(self):
+            count = 0
+            async for document in self.cursor:
+                if count == 2:
+                    raise NetworkTimeout("connection lost mid-export")
+                count += 1
+                yield document
+
+        async def close(self):
+            await self.cursor.close()
+
+    find = collection.find
+
+    def export_find(*args, **kwargs):
+        # Only the export passes batch_size; the auth lookups must still work
+        cursor = find(*args, **kwargs)
+        return FailingCursor(cursor) if "batch_size" in kwargs else cursor
+
+    monkeypatch.setattr(collection, "find", export_find)
+    monkeypatch.setattr(users, "get_users_collection", lambda: collection)
+
+    # A truncated export must not look like a complete one
+    with pytest.raises(NetworkTimeout):
+        client.get("/users/export", headers=admin)